@@ -2,22 +2,41 @@ import os
 from dotenv import load_dotenv
 from agno.team.team import Team
 from .model.agent_model import agent_model
+from .model.llm_scheduler import current_session
+from .model.context_budget import PromptMetrics, context_budget, current_prompt_metrics
 from .resume_builder_agent import ResumeBuilderAgent
+from ..helpers.agent_stream import AgentStreamRelay
+from ..helpers.html_utils import extract_resume_html
+from ..helpers.tracing import tracer
 from textwrap import dedent
 
 # Load environment variables
 load_dotenv()
 DEBUG = os.getenv("DEBUG", "false") == "true"
+# Stream partial model output to the client while the team runs
+AGENTS_STREAM = os.getenv("AGENTS_STREAM", "true") == "true"
+# Run the ResumeBuilder directly and do the leader's saving and UI updates in code
+AGENTS_PIPELINE_MODE = os.getenv("AGENTS_PIPELINE_MODE", "false") == "true"
+# Bump whenever the prompts below change so cached generations are not reused
+PROMPT_VERSION = "1"
+
+RESUME_READY_MESSAGE = "Here's the latest version of your tailored resume. Feel free to share feedback!"
+RESUME_UPDATED_MESSAGE = "I've updated your resume based on your input. Let me know if you want changes."
 
 class ResumeTeam:
     def __init__(self, session_id: str, session_tools: any):
         self.session_id = session_id
         self.session_tools = session_tools
+        self.builder = ResumeBuilderAgent(session_id=session_id, session_tools=self.session_tools, pipeline=AGENTS_PIPELINE_MODE)
+        self.team = None
+        if AGENTS_PIPELINE_MODE:
+            return
+        
         self.team = Team(
             name="Resume Team",
             model=agent_model,
             mode="coordinate",
-            members=[ResumeBuilderAgent(session_id=session_id, session_tools=self.session_tools)],
+            members=[self.builder],
             tools=[
                 self.session_tools.get_resume_markdown,
                 self.session_tools.save_resume_markdown,
@@ -114,16 +133,32 @@ class ResumeTeam:
         )
 
     async def generate_resume(self) -> str:
+        if self.team is None:
+            return await self._run(
+                "Build a resume for the user using the user profile and job description.",
+                resume_message=RESUME_READY_MESSAGE,
+                name="generate"
+            )
+        
         message = f"""
         Build a resume for the user using the user profile and job description.
         
         NOTE:
           - Save the resume and trigger resume updated event. Unless then your task is not done
         """
-        response = await self.team.arun(message)
-        return response.content
+        return await self._run(message, name="generate")
 
     async def process_user_message(self, user_message: str) -> str:
+        if self.team is None:
+            message = f"""
+            You are given a user message.
+             - If the message is requesting for a resume update, fetch the latest resume and refine it based on it
+             - Or else simply reply appropriately to the user
+
+            USER MESSAGE: {user_message}
+            """
+            return await self._run(message, resume_message=RESUME_UPDATED_MESSAGE, name="user_message")
+        
         message = f"""
         You are given a user message.
          - If the message is requesting for a resume update, refine the resume based on it
@@ -134,5 +169,86 @@ class ResumeTeam:
           
         USER MESSAGE: {user_message}
         """
-        response = await self.team.arun(message)
-        return response.content
+        return await self._run(message, name="user_message")
+
+    async def _run(self, message: str, resume_message: str = RESUME_UPDATED_MESSAGE, name: str = "run") -> str:
+        """Run the team, or the builder alone in pipeline mode, on behalf of this session and record its prompt sizes and trace."""
+        # Model calls made by this run are queued and measured under this session
+        current_session.set(self.session_id)
+        metrics = PromptMetrics()
+        current_prompt_metrics.set(metrics)
+        
+        with tracer.trace(name, session_id=self.session_id, mode="pipeline" if self.team is None else "team", message_chars=len(message)) as trace:
+            try:
+                if self.team is None:
+                    return await self._run_pipeline(message, resume_message)
+                return await self._run_team(message)
+            finally:
+                context_budget.record_run(self.session_id, metrics)
+                if trace is not None:
+                    trace.set(**metrics.to_dict())
+
+    async def _run_team(self, message: str) -> str:
+        """
+        Run the team, streaming partial output to the client when enabled.
+
+        Leader text is forwarded as chat deltas and ResumeBuilder output as
+        resume deltas; the tool calls still deliver the final message and resume.
+        """
+        if not AGENTS_STREAM:
+            response = await self.team.arun(message)
+            return response.content
+
+        relay = AgentStreamRelay(send=self.session_tools.send_stream_delta)
+        content = []
+        async for event in await self.team.arun(message, stream=True):
+            delta = getattr(event, "content", None)
+            if not isinstance(delta, str) or not delta:
+                delta = None
+
+            if event.event == "TeamRunResponseContent" and delta:
+                content.append(delta)
+                await relay.feed_chat(delta)
+            elif event.event == "RunResponseContent" and delta:
+                await relay.feed_resume(delta)
+            else:
+                # Tool calls pause the text stream; send what is buffered instead of holding it until the run ends
+                await relay.flush()
+
+        await relay.flush()
+        return "".join(content)
+
+    async def _run_pipeline(self, message: str, resume_message: str) -> str:
+        """
+        Run the ResumeBuilder directly. A reply containing a resume is cleaned,
+        saved and pushed to the preview by code, followed by a fixed message;
+        any other reply is sent to the user as is.
+        """
+        if AGENTS_STREAM:
+            relay = AgentStreamRelay(send=self.session_tools.send_stream_delta)
+            content = []
+            async for event in await self.builder.arun(message, stream=True):
+                delta = getattr(event, "content", None)
+                if event.event == "RunResponseContent" and isinstance(delta, str) and delta:
+                    content.append(delta)
+                    await relay.feed_resume(delta)
+            await relay.flush()
+            output = "".join(content)
+        else:
+            response = await self.builder.arun(message)
+            output = response.content if isinstance(response.content, str) else ""
+
+        resume_html = extract_resume_html(output)
+        if resume_html is None:
+            reply = output.strip()
+            if reply:
+                await self.session_tools.send_agent_response(reply)
+            return reply
+
+        result = self.session_tools.save_resume_markdown(resume_html)
+        if result.startswith("Error"):
+            raise RuntimeError(result)
+
+        await self.session_tools.trigger_resume_updated_event()
+        await self.session_tools.send_agent_response(resume_message)
+        return resume_message
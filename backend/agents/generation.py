@@ -0,0 +1,54 @@
+from typing import TYPE_CHECKING
+from .agent_team import AGENTS_PIPELINE_MODE, PROMPT_VERSION, RESUME_READY_MESSAGE
+from .model.agent_model import MODEL_PROVIDER, MODEL_ID
+from ..helpers.generation_cache import generation_cache, make_generation_cache_key
+from ..helpers.logger import get_logger
+logger = get_logger(__name__)
+
+if TYPE_CHECKING:
+    from ..managers.session_manager import SessionManager
+
+async def run_generation(session_manager: 'SessionManager', session_id: str) -> None:
+    """
+    Generate a resume for a session, reusing an earlier result for identical inputs.
+
+    On a cache hit the resume is saved as a new version and pushed to the
+    client without calling the model. On a miss the agent team runs and the
+    version it saves is cached.
+
+    Args:
+        session_manager: Session manager holding the session
+        session_id: Session to generate the resume for
+    """
+    session = session_manager.get_session(session_id)
+    cache_key = make_generation_cache_key(
+        profile_content=session.user_profile.content,
+        job_description=session.job_description,
+        model_provider=MODEL_PROVIDER,
+        model_id=MODEL_ID,
+        # Pipeline mode prompts the builder differently
+        prompt_version=f"{PROMPT_VERSION}-pipeline" if AGENTS_PIPELINE_MODE else PROMPT_VERSION
+    )
+
+    cached_resume = generation_cache.get(cache_key)
+    if cached_resume is not None:
+        logger.info(f"Serving cached resume for session_id: {session_id}")
+        session_manager.update_resume_markdown(session_id=session_id, resume_markdown=cached_resume)
+
+        socket_handler = session_manager.get_websocket_handler(session_id=session_id)
+        if socket_handler:
+            version = session_manager.get_latest_resume_version(session_id=session_id)
+            await socket_handler.trigger_resume_updated_event(resume_markdown=cached_resume, version=version)
+            await socket_handler.send_agent_response(message=RESUME_READY_MESSAGE)
+        return
+
+    version_before = session_manager.get_latest_resume_version(session_id=session_id)
+    resume_team = session_manager.get_resume_team(session_id)
+    await resume_team.generate_resume()
+
+    # Only cache when the run actually saved a new resume
+    version_after = session_manager.get_latest_resume_version(session_id=session_id)
+    if version_after is not None and version_after != version_before:
+        resume = session_manager.get_resume_markdown(session_id=session_id, version=version_after)
+        if resume:
+            generation_cache.put(cache_key, resume)
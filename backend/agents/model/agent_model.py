@@ -2,6 +2,8 @@ import os
 from dotenv import load_dotenv
 from agno.models.google import Gemini
 from agno.models.lmstudio import LMStudio
+from .llm_scheduler import admission_controlled
+from .replay_model import Replay
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +17,10 @@ model_config = {
     },
     "LMStudio": {
         "get_model": lambda: LMStudio(id=MODEL_ID)
+    },
+    # Offline scripted model for load tests and benchmarks
+    "Replay": {
+        "get_model": lambda: Replay(id=(MODEL_ID or "replay"))
     }
 }
 
@@ -28,4 +34,5 @@ def load_model():
         raise ValueError(f"Unsupported MODEL_PROVIDER: {MODEL_PROVIDER}")
     
 
-agent_model = load_model()
\ No newline at end of file
+# Every agent shares the model, so all calls pass through the global LLM scheduler
+agent_model = admission_controlled(load_model())
\ No newline at end of file
@@ -0,0 +1,191 @@
+from typing import Any, Deque, Dict, List, Optional
+from collections import deque
+from contextvars import ContextVar
+import json
+import os
+import re
+from agno.models.message import Message
+from ...helpers.logger import get_logger
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+AGENT_CONTEXT_TOKEN_BUDGET = int(os.getenv('AGENT_CONTEXT_TOKEN_BUDGET', 32000))  # estimated prompt tokens per model call, 0 disables trimming
+AGENT_CONTEXT_EXCERPT_CHARS = int(os.getenv('AGENT_CONTEXT_EXCERPT_CHARS', 400))  # characters kept from a condensed history message
+PROMPT_METRICS_RUNS_PER_SESSION = int(os.getenv('PROMPT_METRICS_RUNS_PER_SESSION', 20))
+
+# Rough but stable for both English text and HTML
+CHARS_PER_TOKEN = 4
+RESUME_HTML_PATTERN = re.compile(r'<(?:html|body|div|section|h1|h2|ul)\b', re.IGNORECASE)
+RESUME_HTML_MIN_CHARS = 500
+SUPERSEDED_RESUME_NOTE = "[Earlier resume version omitted; fetch the latest with get_resume_markdown]"
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+def estimate_message_tokens(messages: List[Message]) -> int:
+    """Estimate the prompt tokens of a list of messages, including tool call arguments."""
+    total = 0
+    for message in messages:
+        if isinstance(message.content, str):
+            total += estimate_tokens(message.content)
+        if message.tool_calls:
+            total += estimate_tokens(str(message.tool_calls))
+    return total
+
+def _is_resume_html(content: Any) -> bool:
+    return isinstance(content, str) and len(content) >= RESUME_HTML_MIN_CHARS and RESUME_HTML_PATTERN.search(content) is not None
+
+def _condense_resume_arguments(tool_calls: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Copy tool calls with resume HTML arguments (e.g. of save_resume_markdown)
+    replaced by a note, or return None if no argument carries a resume.
+    """
+    if not tool_calls:
+        return None
+
+    condensed_calls = []
+    changed = False
+    for tool_call in tool_calls:
+        function = tool_call.get("function") or {}
+        try:
+            arguments = json.loads(function.get("arguments") or "{}")
+        except (TypeError, ValueError):
+            arguments = None
+
+        if isinstance(arguments, dict) and any(_is_resume_html(value) for value in arguments.values()):
+            arguments = {name: SUPERSEDED_RESUME_NOTE if _is_resume_html(value) else value for name, value in arguments.items()}
+            tool_call = {**tool_call, "function": {**function, "arguments": json.dumps(arguments)}}
+            changed = True
+        condensed_calls.append(tool_call)
+
+    return condensed_calls if changed else None
+
+class PromptMetrics:
+    """Prompt sizes of the model calls made during one agent run."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.tokens_saved = 0
+        self.messages_condensed = 0
+
+    def record(self, tokens_before: int, tokens_after: int, messages_condensed: int) -> None:
+        self.calls += 1
+        self.prompt_tokens += tokens_after
+        self.max_prompt_tokens = max(self.max_prompt_tokens, tokens_after)
+        self.tokens_saved += tokens_before - tokens_after
+        self.messages_condensed += messages_condensed
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "tokens_saved": self.tokens_saved,
+            "messages_condensed": self.messages_condensed
+        }
+
+# Metrics of the agent run the current task belongs to
+current_prompt_metrics: ContextVar[Optional[PromptMetrics]] = ContextVar('current_prompt_metrics', default=None)
+
+class ContextBudget:
+    """
+    Keeps model prompts within a token budget. Messages from earlier turns
+    are condensed, superseded resume versions first, then the oldest turns.
+    The system prompt and the current turn are never touched, and messages
+    are shortened rather than dropped so tool calls stay paired with their
+    results. A superseded resume is condensed wherever it appears: in message
+    content or in the arguments of the tool call that saved it.
+    """
+
+    def __init__(self, token_budget: int = AGENT_CONTEXT_TOKEN_BUDGET, excerpt_chars: int = AGENT_CONTEXT_EXCERPT_CHARS):
+        self._token_budget = token_budget
+        self._excerpt_chars = excerpt_chars
+        self._runs: Dict[str, Deque[Dict[str, int]]] = {}
+
+    def fit(self, messages: List[Message]) -> List[Message]:
+        """
+        Return the messages to send, condensing older history past the budget.
+        The input list and its messages are left unchanged.
+        """
+        tokens_before = estimate_message_tokens(messages)
+        fitted, condensed = self._condense(messages, tokens_before)
+        tokens_after = estimate_message_tokens(fitted) if condensed else tokens_before
+
+        metrics = current_prompt_metrics.get()
+        if metrics is not None:
+            metrics.record(tokens_before, tokens_after, condensed)
+        return fitted
+
+    def _condense(self, messages: List[Message], tokens: int):
+        if self._token_budget <= 0 or tokens <= self._token_budget:
+            return messages, 0
+
+        # History ends where the latest user turn starts
+        current_turn = max((index for index, message in enumerate(messages) if message.role == "user"), default=len(messages))
+        history = [index for index in range(current_turn) if messages[index].role != "system"]
+
+        fitted = list(messages)
+        condensed = 0
+
+        def replace(index: int, **update: Any) -> None:
+            nonlocal tokens, condensed
+            tokens_before = estimate_message_tokens([fitted[index]])
+            fitted[index] = fitted[index].model_copy(update=update)
+            tokens -= tokens_before - estimate_message_tokens([fitted[index]])
+            condensed += 1
+
+        # Only the newest resume in history is still relevant
+        superseded = []
+        for index in history:
+            update: Dict[str, Any] = {}
+            if _is_resume_html(messages[index].content):
+                update["content"] = SUPERSEDED_RESUME_NOTE
+            tool_calls = _condense_resume_arguments(messages[index].tool_calls)
+            if tool_calls is not None:
+                update["tool_calls"] = tool_calls
+            if update:
+                superseded.append((index, update))
+
+        for index, update in superseded[:-1]:
+            if tokens <= self._token_budget:
+                break
+            replace(index, **update)
+
+        for index in history:
+            if tokens <= self._token_budget:
+                break
+            content = fitted[index].content
+            if isinstance(content, str) and len(content) > self._excerpt_chars:
+                omitted = estimate_tokens(content[self._excerpt_chars:])
+                replace(index, content=f"{content[:self._excerpt_chars]}... [{omitted} tokens of earlier conversation omitted]")
+
+        if tokens > self._token_budget:
+            logger.warning(f"Prompt still estimated at {tokens} tokens after condensing history (budget {self._token_budget})")
+        return fitted, condensed
+
+    def fit_request(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the budget to the messages of a model invoke call."""
+        messages = kwargs.get("messages")
+        if not messages:
+            return kwargs
+        return {**kwargs, "messages": self.fit(messages)}
+
+    def record_run(self, session_id: str, metrics: PromptMetrics) -> None:
+        """Keep the prompt metrics of a finished run."""
+        runs = self._runs.setdefault(session_id, deque(maxlen=PROMPT_METRICS_RUNS_PER_SESSION))
+        runs.append(metrics.to_dict())
+        logger.info(f"Prompt metrics for session_id {session_id}: {metrics.to_dict()}")
+
+    def get_runs(self, session_id: str) -> List[Dict[str, int]]:
+        """Prompt metrics of a session's recent runs, oldest first."""
+        return list(self._runs.get(session_id, ()))
+
+    def forget(self, session_id: str) -> None:
+        """Drop the metrics of a deleted session."""
+        self._runs.pop(session_id, None)
+
+# Create a global instance of the context budget
+context_budget = ContextBudget()
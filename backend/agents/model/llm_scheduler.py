@@ -0,0 +1,298 @@
+from typing import Any, Callable, Deque, Dict, List, Optional, Type
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import asyncio
+import os
+import time
+from agno.exceptions import ModelProviderError
+from agno.models.base import Model
+from .context_budget import context_budget, estimate_message_tokens
+from ...helpers.metrics import MODEL_CALL_SECONDS, MODEL_FIRST_CHUNK_SECONDS, MODEL_QUEUE_SECONDS
+from ...helpers.tracing import tracer
+from ...helpers.logger import get_logger
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))  # model calls in flight across all sessions
+LLM_REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', 0))  # set to the provider's quota; 0 disables rate limiting
+LLM_BURST = int(os.getenv('LLM_BURST', 10))  # requests allowed back to back before the rate limit applies
+LLM_RATE_LIMIT_RETRIES = int(os.getenv('LLM_RATE_LIMIT_RETRIES', 3))  # retries of a call rejected with 429
+LLM_RATE_LIMIT_BACKOFF = float(os.getenv('LLM_RATE_LIMIT_BACKOFF', 2))  # seconds before the first retry, doubled each time
+
+# Session on whose behalf model calls in the current task are made
+current_session: ContextVar[Optional[str]] = ContextVar('current_session', default=None)
+
+QueueListener = Callable[[str, int], None]
+
+class LLMScheduler:
+    """
+    Process-wide admission control for model calls: caps concurrent calls,
+    spaces them with a token bucket and serves waiting sessions round-robin,
+    so one busy session cannot starve the others.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, requests_per_minute: float = LLM_REQUESTS_PER_MINUTE, burst: int = LLM_BURST):
+        self._max_concurrency = max(1, max_concurrency)
+        self._rate = requests_per_minute / 60 if requests_per_minute > 0 else None
+        self._capacity = max(1, burst)
+        self._tokens = float(self._capacity)
+        self._refilled_at = time.monotonic()
+        self._active = 0
+        # Waiters per session; the first session in the dict is served next
+        self._waiters: 'OrderedDict[str, Deque[asyncio.Future]]' = OrderedDict()
+        self._positions: Dict[str, int] = {}
+        self._listeners: List[QueueListener] = []
+        self._retry_handle: Optional[asyncio.TimerHandle] = None
+
+    def add_listener(self, listener: QueueListener) -> None:
+        """Register a callback receiving (session_id, position) when a session's place in the queue changes; 0 means admitted."""
+        self._listeners.append(listener)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Calls in flight and calls waiting for admission."""
+        return {
+            "active": self._active,
+            "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+            "waiting_sessions": len(self._waiters)
+        }
+
+    @asynccontextmanager
+    async def slot(self, session_id: Optional[str] = None):
+        """Hold an admission slot for the duration of a model call."""
+        with MODEL_QUEUE_SECONDS.time():
+            await self.acquire(session_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, session_id: Optional[str] = None) -> None:
+        """Wait until a model call for the session may start."""
+        key = session_id or ""
+        if not self._waiters and self._active < self._max_concurrency and self._take_token():
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller gave up; hand the slot on
+                self.release()
+            else:
+                self._discard(key, future)
+            raise
+
+    def release(self) -> None:
+        """Return a slot taken by acquire."""
+        self._active -= 1
+        self._dispatch()
+
+    def penalize(self) -> None:
+        """Empty the token bucket after the provider reported a rate limit."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._rate is not None:
+            self._tokens = min(self._capacity, self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    def _take_token(self) -> bool:
+        if self._rate is None:
+            return True
+
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._active < self._max_concurrency:
+            if not self._take_token():
+                self._schedule_retry()
+                break
+
+            session_id, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                # Round-robin: the session goes to the back of the line
+                self._waiters.move_to_end(session_id)
+            else:
+                del self._waiters[session_id]
+
+            self._active += 1
+            future.set_result(None)
+
+        self._publish_positions()
+
+    def _schedule_retry(self) -> None:
+        if self._retry_handle is not None:
+            return
+
+        delay = (1 - self._tokens) / self._rate
+
+        def retry():
+            self._retry_handle = None
+            self._dispatch()
+
+        self._retry_handle = asyncio.get_running_loop().call_later(delay, retry)
+
+    def _discard(self, session_id: str, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(session_id)
+        if waiters is None:
+            return
+
+        try:
+            waiters.remove(future)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiters[session_id]
+        self._publish_positions()
+
+    def _publish_positions(self) -> None:
+        """Tell listeners where each waiting session stands; with round-robin that is its place among sessions."""
+        positions = {session_id: index + 1 for index, session_id in enumerate(self._waiters)}
+        changed = {session_id: position for session_id, position in positions.items() if self._positions.get(session_id) != position}
+        # Sessions that left the queue were admitted or gave up
+        changed.update({session_id: 0 for session_id in self._positions if session_id not in positions})
+        self._positions = positions
+
+        for session_id, position in changed.items():
+            if not session_id:
+                continue
+            for listener in self._listeners:
+                try:
+                    listener(session_id, position)
+                except Exception as e:
+                    logger.error(f"Queue listener failed: {str(e)}")
+
+_scheduled_classes: Dict[Type[Model], Type[Model]] = {}
+
+def admission_controlled(model: Model) -> Model:
+    """
+    Route a model's async calls through the global LLM scheduler, after
+    fitting their messages into the context budget.
+
+    The model's class is swapped for a subclass, so copies agno makes of the
+    model stay scheduled as well.
+    """
+    base = type(model)
+    if base in _scheduled_classes.values():
+        return model
+
+    if base not in _scheduled_classes:
+        class AdmissionControlledModel(base):
+            async def ainvoke(self, *args, **kwargs) -> Any:
+                kwargs = context_budget.fit_request(kwargs)
+                tracer.start_turn()
+                with tracer.span("model request", "model", **_request_attributes(self, kwargs, stream=False)) as span:
+                    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+                        queued = time.perf_counter()
+                        async with llm_scheduler.slot(current_session.get()):
+                            _record_admission(span, queued, attempt)
+                            try:
+                                with MODEL_CALL_SECONDS.time(self.provider, self.id, "false"):
+                                    response = await super().ainvoke(*args, **kwargs)
+                                if span is not None:
+                                    span.set(**_response_usage(response))
+                                return response
+                            except ModelProviderError as e:
+                                if e.status_code != 429 or attempt == LLM_RATE_LIMIT_RETRIES:
+                                    raise
+                                llm_scheduler.penalize()
+                        await _backoff(attempt)
+
+            async def ainvoke_stream(self, *args, **kwargs):
+                kwargs = context_budget.fit_request(kwargs)
+                tracer.start_turn()
+                with tracer.span("model request", "model", **_request_attributes(self, kwargs, stream=True)) as span:
+                    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+                        started = False
+                        queued = time.perf_counter()
+                        async with llm_scheduler.slot(current_session.get()):
+                            _record_admission(span, queued, attempt)
+                            try:
+                                # Includes time the consumer spends between chunks
+                                with MODEL_CALL_SECONDS.time(self.provider, self.id, "true"):
+                                    call_started = time.perf_counter()
+                                    chunks = 0
+                                    async for chunk in super().ainvoke_stream(*args, **kwargs):
+                                        chunks += 1
+                                        if not started:
+                                            started = True
+                                            first_chunk = time.perf_counter() - call_started
+                                            MODEL_FIRST_CHUNK_SECONDS.observe(first_chunk, self.provider, self.id)
+                                            if span is not None:
+                                                span.set(first_chunk_ms=round(first_chunk * 1000, 3))
+                                        if span is not None:
+                                            # Providers report usage on the last chunk
+                                            span.set(chunks=chunks, **_response_usage(chunk))
+                                        yield chunk
+                                return
+                            except ModelProviderError as e:
+                                # Only a call that produced nothing yet can be retried transparently
+                                if e.status_code != 429 or started or attempt == LLM_RATE_LIMIT_RETRIES:
+                                    raise
+                                llm_scheduler.penalize()
+                        await _backoff(attempt)
+
+        AdmissionControlledModel.__name__ = base.__name__
+        AdmissionControlledModel.__qualname__ = base.__qualname__
+        _scheduled_classes[base] = AdmissionControlledModel
+
+    model.__class__ = _scheduled_classes[base]
+    return model
+
+def _request_attributes(model: Model, kwargs: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+    return {
+        "provider": model.provider,
+        "model": model.id,
+        "stream": stream,
+        "messages": len(kwargs.get("messages") or []),
+        "input_tokens_est": estimate_message_tokens(kwargs.get("messages") or [])
+    }
+
+def _record_admission(span: Optional[Any], queued: float, attempt: int) -> None:
+    if span is None:
+        return
+    queue_ms = round((time.perf_counter() - queued) * 1000, 3)
+    span.set(attempts=attempt + 1, queue_ms=span.attributes.get("queue_ms", 0) + queue_ms)
+
+def _response_usage(response: Any) -> Dict[str, int]:
+    """Token counts reported by the provider on a response or chunk, if any."""
+    if isinstance(response, dict):
+        usage = response.get("usage")
+    else:
+        usage = getattr(response, "usage_metadata", None) or getattr(response, "usage", None)
+    if usage is None:
+        return {}
+
+    def read(*keys: str) -> Optional[int]:
+        for key in keys:
+            value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+            if isinstance(value, int):
+                return value
+        return None
+
+    counts = {
+        "input_tokens": read("prompt_token_count", "prompt_tokens", "input_tokens"),
+        "output_tokens": read("candidates_token_count", "completion_tokens", "output_tokens")
+    }
+    return {key: value for key, value in counts.items() if value is not None}
+
+async def _backoff(attempt: int) -> None:
+    delay = LLM_RATE_LIMIT_BACKOFF * (2 ** attempt)
+    logger.warning(f"Model provider rate limited the request, retrying in {delay:.1f}s")
+    await asyncio.sleep(delay)
+
+# Create a global instance of the LLM scheduler
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,127 @@
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from uuid import uuid4
+import asyncio
+import json
+import os
+import time
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+from .context_budget import estimate_tokens
+
+# Get configuration from environment variables with defaults
+REPLAY_SCRIPT_PATH = os.getenv('REPLAY_SCRIPT_PATH', os.path.join(os.path.dirname(__file__), 'replay_scripts', 'resume_team.json'))
+REPLAY_LATENCY = float(os.getenv('REPLAY_LATENCY', 0.5))  # seconds before the first token
+REPLAY_TOKENS_PER_SECOND = float(os.getenv('REPLAY_TOKENS_PER_SECOND', 80))  # 0 returns output instantly
+
+# Replaced in tool call arguments and content with the latest tool result
+LAST_TOOL_RESULT = "{{last_tool_result}}"
+
+@lru_cache(maxsize=8)
+def load_replay_script(path: str) -> List[Dict[str, Any]]:
+    """Load and cache a replay script: a list of agents, each with a system-prompt `match` and `steps`."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["agents"]
+
+@dataclass
+class Replay(Model):
+    """
+    Offline stand-in model that replays a recorded script of tool calls and
+    responses, with simulated latency and token rate.
+
+    The agent is picked by the first script entry whose `match` string occurs
+    in the system message. The step is the number of assistant turns since the
+    latest user message, so each tool round-trip advances the script by one.
+    A step past the end of the script ends the run with an empty reply.
+    """
+
+    id: str = "replay"
+    name: str = "Replay"
+    provider: str = "Replay"
+
+    script_path: str = REPLAY_SCRIPT_PATH
+    latency: float = REPLAY_LATENCY
+    tokens_per_second: float = REPLAY_TOKENS_PER_SECOND
+    # Tokens per streamed chunk
+    chunk_tokens: int = 4
+
+    def _next_step(self, messages: List[Message]) -> Dict[str, Any]:
+        system_prompt = next((str(message.content) for message in messages if message.role == "system"), "")
+        agent = next((agent for agent in load_replay_script(self.script_path) if agent.get("match", "") in system_prompt), None)
+        if agent is None:
+            return self._render({"content": ""}, "")
+
+        last_user = max((index for index, message in enumerate(messages) if message.role == "user"), default=-1)
+        step = sum(1 for message in messages[last_user + 1:] if message.role == self.assistant_message_role)
+        if step >= len(agent["steps"]):
+            return self._render({"content": ""}, "")
+
+        last_tool_result = next((str(message.content) for message in reversed(messages) if message.role == self.tool_message_role), "")
+        return self._render(agent["steps"][step], last_tool_result)
+
+    def _render(self, step: Dict[str, Any], last_tool_result: str) -> Dict[str, Any]:
+        content = step.get("content")
+        if isinstance(content, str):
+            content = content.replace(LAST_TOOL_RESULT, last_tool_result)
+
+        tool_calls = []
+        for call in step.get("tool_calls", []):
+            arguments = {
+                key: value.replace(LAST_TOOL_RESULT, last_tool_result) if isinstance(value, str) else value
+                for key, value in call.get("arguments", {}).items()
+            }
+            tool_calls.append({
+                "id": str(uuid4()),
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(arguments)}
+            })
+
+        return {"content": content, "tool_calls": tool_calls}
+
+    def _generation_time(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return estimate_tokens(text) / self.tokens_per_second
+
+    def _size(self, response: Dict[str, Any]) -> str:
+        return (response["content"] or "") + "".join(call["function"]["arguments"] for call in response["tool_calls"])
+
+    def _chunks(self, response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        content = response["content"] or ""
+        size = max(1, self.chunk_tokens * 4)
+        for start in range(0, len(content), size):
+            yield {"content": content[start:start + size], "tool_calls": []}
+        if response["tool_calls"]:
+            yield {"content": None, "tool_calls": response["tool_calls"]}
+
+    def invoke(self, messages: List[Message], response_format: Optional[Any] = None, tools: Optional[List[Dict[str, Any]]] = None, tool_choice: Optional[Any] = None) -> Dict[str, Any]:
+        response = self._next_step(messages)
+        time.sleep(self.latency + self._generation_time(self._size(response)))
+        return response
+
+    async def ainvoke(self, messages: List[Message], response_format: Optional[Any] = None, tools: Optional[List[Dict[str, Any]]] = None, tool_choice: Optional[Any] = None) -> Dict[str, Any]:
+        response = self._next_step(messages)
+        await asyncio.sleep(self.latency + self._generation_time(self._size(response)))
+        return response
+
+    def invoke_stream(self, messages: List[Message], response_format: Optional[Any] = None, tools: Optional[List[Dict[str, Any]]] = None, tool_choice: Optional[Any] = None) -> Iterator[Dict[str, Any]]:
+        response = self._next_step(messages)
+        time.sleep(self.latency)
+        for chunk in self._chunks(response):
+            time.sleep(self._generation_time(self._size(chunk)))
+            yield chunk
+
+    async def ainvoke_stream(self, messages: List[Message], response_format: Optional[Any] = None, tools: Optional[List[Dict[str, Any]]] = None, tool_choice: Optional[Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        response = self._next_step(messages)
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(response):
+            await asyncio.sleep(self._generation_time(self._size(chunk)))
+            yield chunk
+
+    def parse_provider_response(self, response: Dict[str, Any], **kwargs) -> ModelResponse:
+        return ModelResponse(role=self.assistant_message_role, content=response["content"], tool_calls=list(response["tool_calls"]))
+
+    def parse_provider_response_delta(self, response: Dict[str, Any]) -> ModelResponse:
+        return ModelResponse(role=self.assistant_message_role, content=response["content"], tool_calls=list(response["tool_calls"]))
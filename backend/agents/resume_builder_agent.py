@@ -2,28 +2,40 @@ import os
 from dotenv import load_dotenv
 from .model.agent_model import agent_model
 from agno.agent import Agent
+from ..helpers.tracing import tracer
 from textwrap import dedent
 
 # Load environment variables
 load_dotenv()
 DEBUG = os.getenv("DEBUG", "false") == "true"
 
+# Appended to the instructions when the builder runs without the TeamLeader
+PIPELINE_INSTRUCTIONS = dedent("""\
+
+    # Pipeline Mode
+    - Your reply is shown to the user directly and saved for you. DO NOT call any tool to save the resume.
+    - When building or refining the resume, reply with the complete resume HTML only.
+    - When the message does not ask for a change to the resume, reply with a short plain-text message for the user and no HTML.
+""")
+
 class ResumeBuilderAgent(Agent):
-    def __init__(self, session_id: str, session_tools: any):
+    def __init__(self, session_id: str, session_tools: any, pipeline: bool = False):
         self.session_id = session_id
         self.session_tools = session_tools
+        tools = [
+            self.session_tools.get_user_profile,
+            self.session_tools.get_job_description,
+            self.session_tools.get_resume_markdown,
+            self.session_tools.get_resume_versions,
+        ]
+        if not pipeline:
+            tools.append(self.session_tools.save_resume_markdown)
         super().__init__(
             name="Resume Builder",
             role="Resume Builder",
             goal="Create or refine ATS friendly resume",
             model=agent_model,
-            tools=[
-                self.session_tools.get_user_profile,
-                self.session_tools.get_job_description,
-                self.session_tools.get_resume_markdown,
-                self.session_tools.get_resume_versions,
-                self.session_tools.save_resume_markdown,
-            ],
+            tools=tools,
             description=dedent("""\
                 You are ResumeBuilder, an AI agent that specializes in generating and refining highly tailored, ATS-friendly resumes in clean, semantic HTML format.
 
@@ -80,10 +92,19 @@ class ResumeBuilderAgent(Agent):
                 🗃️ State: Handled through versioned tools
                 📤 UI: Keep the preview synced and user informed
 
-            """),
+            """) + (PIPELINE_INSTRUCTIONS if pipeline else ""),
             read_chat_history=True,
             update_knowledge=True,
             show_tool_calls=True,
             markdown=False,
             debug_mode=DEBUG,
         )
+
+    async def arun(self, *args, **kwargs):
+        """Run the agent, tracing the run as a member of the current agent run."""
+        if kwargs.get("stream"):
+            # Streamed runs do their work while the returned events are consumed
+            return tracer.scope_stream(self.name, await super().arun(*args, **kwargs), agent=self.name)
+        
+        with tracer.scope(self.name, agent=self.name):
+            return await super().arun(*args, **kwargs)
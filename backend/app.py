@@ -1,13 +1,21 @@
-from fastapi import FastAPI, WebSocket, UploadFile, HTTPException, File, Cookie, WebSocketDisconnect, WebSocketException, status
+from fastapi import FastAPI, Request, WebSocket, UploadFile, HTTPException, File, Cookie, Header, WebSocketDisconnect, WebSocketException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
+import secrets
+import time
 import os
 from dotenv import load_dotenv
 from .managers.session_manager import session_manager
-from .models.schemas import JobDescription
+from .models.schemas import JobDescription, BatchRequest
 from .services.user_profile_service import handle_file_upload
 from .services.job_description_service import handle_job_description
+from .services.batch_service import handle_batch_request
+from .services.job_service import handle_generate_request, handle_job_status
+from .managers.batch_manager import batch_manager
+from .managers.ingestion_manager import ingestion_manager
+from .helpers.metrics import metrics, HTTP_REQUEST_SECONDS
+from .helpers.tracing import tracer
 from .helpers.logger import get_logger
 logger = get_logger(__name__)
 
@@ -17,6 +25,7 @@ load_dotenv()
 # Constants
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
 SESSION_COOKIE_MAX_AGE = int(os.getenv('SESSION_COOKIE_MAX_AGE', 1800))  # 30 minutes default
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # bearer token for /api/metrics, which is disabled while empty
 
 app = FastAPI(title="Agentic Resume Builder")
 
@@ -32,9 +41,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so session ids and file paths don't create new series
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, getattr(route, "path", "unmatched"), response.status_code)
+    return response
+
 # Mount static files (except index.html) at /static
 app.mount("/static", StaticFiles(directory="frontend"), name="frontend")
 
+@app.on_event("startup")
+async def start_session_cleanup():
+    # The app may be imported before the event loop starts
+    session_manager.start_cleanup_task()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    ingestion_manager.shutdown()
+    tracer.close()
+
 # Serve index.html at root
 @app.get("/")
 async def read_index():
@@ -56,6 +84,42 @@ async def validate_session(session_id: str = Cookie(None)):
     
     return {"valid": True, "session_id": session_id}
 
+@app.get("/api/session/prompt-metrics")
+async def get_prompt_metrics(session_id: str = Cookie(None)):
+    """Prompt sizes of the session's recent agent runs."""
+    if not session_id or not session_manager.is_valid_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {"session_id": session_id, "runs": session_manager.get_prompt_metrics(session_id=session_id)}
+
+@app.get("/api/session/traces")
+async def get_traces(session_id: str = Cookie(None)):
+    """Span trees of the session's recent agent runs."""
+    if not session_id or not session_manager.is_valid_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {"session_id": session_id, "traces": session_manager.get_traces(session_id=session_id)}
+
+def check_metrics_token(authorization: str = None):
+    """Only operators holding METRICS_TOKEN may read per-session metrics."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+@app.get("/api/metrics", include_in_schema=False)
+async def get_metrics(top: int = 10, authorization: str = Header(None)):
+    """Session counts and estimated memory by component, with the heaviest sessions."""
+    check_metrics_token(authorization)
+    return await session_manager.get_memory_stats(top=min(max(top, 0), 100))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_prometheus_metrics():
+    """Latency histograms in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 def check_session_id(session_id: str):
     """Middleware/dependency to check if session_id is valid for WebSocket."""
     if not session_id or not session_manager.is_valid_session(session_id):
@@ -83,6 +147,9 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket client disconnected for session_id: {session_id}")
+        ws_handler = session_manager.get_websocket_handler(session_id=session_id)
+        if ws_handler:
+            ws_handler.handle_disconnect(websocket)
     except Exception as e:
         await websocket.send_json({
             "type": "error",
@@ -93,7 +160,9 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
 async def upload_file(file: UploadFile = File(...), session_id: str = Cookie(None)):
     try:
         # Delegate to service function
-        return handle_file_upload(file, session_id)
+        return await handle_file_upload(file, session_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")  # Debug log
         raise HTTPException(status_code=500, detail=str(e))
@@ -103,6 +172,59 @@ async def submit_job_description(job_description: JobDescription, session_id: st
     try:
         # Delegate to service function
         return handle_job_description(job_description, session_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Job description error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@app.post("/api/generate", status_code=202)
+async def start_generation(session_id: str = Cookie(None)):
+    """Generate a resume in the background; returns the job, which keeps running if the client disconnects."""
+    try:
+        # Delegate to service function
+        return handle_generate_request(session_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Generate error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, session_id: str = Cookie(None)):
+    """Status of a generation job, with the resume once it completed."""
+    return handle_job_status(job_id, session_id)
+
+@app.post("/api/batch", status_code=202)
+async def create_batch(batch_request: BatchRequest, session_id: str = Cookie(None)):
+    """Generate a resume for each job description against the session's uploaded profile."""
+    try:
+        # Delegate to service function
+        return handle_batch_request(batch_request, session_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/batch/{batch_id}")
+async def get_batch(batch_id: str, session_id: str = Cookie(None)):
+    """Per-item status and timing of a batch."""
+    batch = batch_manager.get_batch(session_id=session_id, batch_id=batch_id) if session_id else None
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return batch.to_dict()
+
+@app.get("/api/batch/{batch_id}/items/{index}")
+async def get_batch_item(batch_id: str, index: int, session_id: str = Cookie(None)):
+    """The resume generated for one batch item."""
+    batch = batch_manager.get_batch(session_id=session_id, batch_id=batch_id) if session_id else None
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    resume_markdown = batch_manager.get_item_resume(batch, index)
+    if resume_markdown is None:
+        raise HTTPException(status_code=404, detail="No resume for this item")
+    
+    return {"index": index, "version": batch.items[index].version, "data": resume_markdown}
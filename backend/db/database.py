@@ -0,0 +1,29 @@
+import os
+from dotenv import load_dotenv
+from .session_store import SessionStore
+from .in_memory_db import InMemoryDB
+from .sqlite_db import SQLiteDB
+
+# Load environment variables
+load_dotenv()
+
+DB_BACKEND = os.getenv("DB_BACKEND", "memory")
+
+db_config = {
+    "memory": {
+        "get_db": lambda: InMemoryDB()
+    },
+    "sqlite": {
+        "get_db": lambda: SQLiteDB()
+    }
+}
+
+def load_db() -> SessionStore:
+    try:
+        return db_config[DB_BACKEND]["get_db"]()
+
+    except KeyError:
+        raise ValueError(f"Unsupported DB_BACKEND: {DB_BACKEND}")
+
+# Create a global instance for the configured backend
+db = load_db()
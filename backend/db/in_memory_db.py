@@ -2,11 +2,13 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 import os
 from ..models.schemas import UserProfileFile, DBSession
+from .session_store import SessionStore
+from .resume_version_store import ResumeVersionStore
 
 # Get configuration from environment variables with defaults
 MAX_RESUMES_PER_SESSION = int(os.getenv('MAX_RESUMES_PER_SESSION', 5))
 
-class InMemoryDB:
+class InMemoryDB(SessionStore):
     def __init__(self):
         self._sessions: Dict[str, DBSession] = {}
     
@@ -22,7 +24,7 @@ class InMemoryDB:
             last_updated=datetime.utcnow(),
             user_profile=None,
             job_description=None,
-            resume_store={}
+            resume_store=ResumeVersionStore(max_versions=MAX_RESUMES_PER_SESSION)
         )
         return self._sessions[session_id]
     
@@ -31,6 +33,18 @@ class InMemoryDB:
         session = self._sessions.get(session_id)
         return session
     
+    def touch_session_record(self, session_id: str) -> bool:
+        """Push back a session's last use."""
+        if session_id not in self._sessions:
+            return False
+        
+        self._sessions[session_id].last_updated = datetime.utcnow()
+        return True
+    
+    def get_resident_record(self, session_id: str) -> Optional[DBSession]:
+        """Every record is held in memory."""
+        return self._sessions.get(session_id)
+    
     def update_user_profile(self, session_id: str, user_profile: Dict[str, Any]) -> bool:
         """Update resume data for a session."""
         if session_id not in self._sessions:
@@ -45,6 +59,7 @@ class InMemoryDB:
             parsed_at=datetime.fromisoformat(user_profile["parsed_at"])
         )
         session.last_updated = datetime.utcnow()
+        session.version += 1
         return True
     
     def update_resume_markdown(self, session_id: str, resume_markdown: str, version: Optional[int]=None) -> bool:
@@ -53,18 +68,10 @@ class InMemoryDB:
             return False
         
         session = self._sessions[session_id]
-        
-        if version is None:
-            version = max(session.resume_store.keys(), default=0) + 1
-            
-        session.resume_store[version] = resume_markdown
-        
-        # Enforce a maximum number of resumes
-        if len(session.resume_store) > MAX_RESUMES_PER_SESSION:
-            oldest_version = min(session.resume_store.keys())
-            del session.resume_store[oldest_version]
+        session.resume_store.add(resume_markdown, version=version)
             
         session.last_updated = datetime.utcnow()
+        session.version += 1
         return True
     
     def get_resume_markdown(self, session_id: str, version: Optional[int]=None) -> Optional[str]:
@@ -73,15 +80,7 @@ class InMemoryDB:
             return None
         
         session = self._sessions[session_id]
-    
-        if version is None:
-            version = max(session.resume_store.keys(), default=0)
-            
-        if version not in session.resume_store:
-            return None
-            
-        resume_markdown = session.resume_store[version]
-        return resume_markdown
+        return session.resume_store.get(version)
     
     def update_job_description(self, session_id: str, job_description: str) -> bool:
         """Update job description for a session."""
@@ -91,6 +90,7 @@ class InMemoryDB:
         session = self._sessions[session_id]
         session.job_description = job_description
         session.last_updated = datetime.utcnow()
+        session.version += 1
         return True
     
     def delete_session_record(self, session_id: str) -> bool:
@@ -99,7 +99,4 @@ class InMemoryDB:
             return False
         
         del self._sessions[session_id]
-        return True
-
-# Create a global instance with configured timeout
-db = InMemoryDB() 
\ No newline at end of file
+        return True 
\ No newline at end of file
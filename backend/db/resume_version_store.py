@@ -0,0 +1,172 @@
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import deque
+import json
+import os
+import zlib
+from ..helpers.text_delta import diff_text, apply_delta
+
+# Get configuration from environment variables with defaults
+MAX_RESUMES_PER_SESSION = int(os.getenv('MAX_RESUMES_PER_SESSION', 5))
+
+class ResumeVersionStore:
+    """
+    Ring buffer of resume versions. The latest version is kept in full; each
+    older version is stored as a compressed delta that rebuilds it from the
+    next newer one, so near-identical refinements cost a few hundred bytes.
+
+    A store built from stored versions keeps them as loaded and only computes
+    the deltas once a new version is added, so loading a record is not
+    proportional to its history.
+    """
+
+    def __init__(self, max_versions: int = MAX_RESUMES_PER_SESSION):
+        self._max_versions = max(1, max_versions)
+        # (version, compressed delta to rebuild it from the next version); the newest entry has no delta
+        self._entries: Deque[Tuple[int, Optional[bytes]]] = deque()
+        self._latest: Optional[str] = None
+        # Full versions loaded by from_versions, in ascending order, until the deltas are computed
+        self._loaded: Optional[Dict[int, str]] = None
+
+    @classmethod
+    def from_versions(cls, versions: Dict[int, str], max_versions: int = MAX_RESUMES_PER_SESSION) -> 'ResumeVersionStore':
+        """Build a store from a {version: resume} mapping without diffing the versions yet."""
+        store = cls(max_versions=max_versions)
+        if versions:
+            store._loaded = {version: versions[version] for version in sorted(versions)[-store._max_versions:]}
+        return store
+
+    def _hydrate(self) -> None:
+        """Turn loaded full versions into the delta chain."""
+        if self._loaded is None:
+            return
+
+        loaded, self._loaded = self._loaded, None
+        for version, resume in loaded.items():
+            self._append(resume, version)
+
+    def __len__(self) -> int:
+        if self._loaded is not None:
+            return len(self._loaded)
+        return len(self._entries)
+
+    def __contains__(self, version: int) -> bool:
+        if self._loaded is not None:
+            return version in self._loaded
+        return any(entry_version == version for entry_version, _ in self._entries)
+
+    @property
+    def latest_version(self) -> int:
+        """Newest version number, 0 when empty."""
+        if self._loaded is not None:
+            return next(reversed(self._loaded))
+        return self._entries[-1][0] if self._entries else 0
+
+    @property
+    def oldest_version(self) -> int:
+        """Oldest retained version number, 0 when empty."""
+        if self._loaded is not None:
+            return next(iter(self._loaded))
+        return self._entries[0][0] if self._entries else 0
+
+    def versions(self) -> List[int]:
+        """Retained version numbers in ascending order."""
+        if self._loaded is not None:
+            return list(self._loaded)
+        return [version for version, _ in self._entries]
+
+    def add(self, resume: str, version: Optional[int] = None) -> int:
+        """
+        Save a resume version, evicting the oldest one past the limit.
+
+        Args:
+            resume: Resume content
+            version: Optional. Version number; defaults to the latest plus one
+
+        Returns:
+            int: The saved version number
+        """
+        self._hydrate()
+        if version is None:
+            version = self.latest_version + 1
+
+        if self._entries and version <= self.latest_version:
+            # Rewriting history is rare; rebuild the chain from full copies
+            versions = self.to_dict()
+            versions[version] = resume
+            self._entries.clear()
+            self._latest = None
+            for existing_version in sorted(versions):
+                self._append(versions[existing_version], existing_version)
+        else:
+            self._append(resume, version)
+
+        return version
+
+    def _append(self, resume: str, version: int) -> None:
+        """Append a version newer than every retained one."""
+        if self._entries:
+            previous_version, _ = self._entries.pop()
+            # Too large or slow to diff: keep the previous version in full
+            delta = diff_text(resume, self._latest) or [["+", self._latest]]
+            self._entries.append((previous_version, self._encode(delta)))
+
+        self._entries.append((version, None))
+        self._latest = resume
+
+        # Enforce a maximum number of resumes
+        while len(self._entries) > self._max_versions:
+            self._entries.popleft()
+
+    def get(self, version: Optional[int] = None) -> Optional[str]:
+        """Get a version, the latest by default, or None if it is not retained."""
+        if self._loaded is not None:
+            return self._loaded.get(self.latest_version if version is None else version)
+
+        if not self._entries:
+            return None
+
+        if version is None or version == self.latest_version:
+            return self._latest
+
+        if version < self.oldest_version or version > self.latest_version:
+            return None
+
+        # Walk back from the newest version applying each delta
+        resume = self._latest
+        for entry_version, delta in reversed(list(self._entries)[:-1]):
+            resume = apply_delta(resume, self._decode(delta))
+            if entry_version == version:
+                return resume
+        return None
+
+    def to_dict(self) -> Dict[int, str]:
+        """Materialize every retained version."""
+        if self._loaded is not None:
+            return dict(self._loaded)
+
+        versions: Dict[int, str] = {}
+        if not self._entries:
+            return versions
+
+        resume = self._latest
+        versions[self.latest_version] = resume
+        for entry_version, delta in reversed(list(self._entries)[:-1]):
+            resume = apply_delta(resume, self._decode(delta))
+            versions[entry_version] = resume
+        return versions
+
+    def nbytes(self) -> int:
+        """Approximate bytes held: the latest version plus compressed deltas."""
+        if self._loaded is not None:
+            return sum(len(resume.encode('utf-8')) for resume in self._loaded.values())
+
+        latest_bytes = len(self._latest.encode('utf-8')) if self._latest else 0
+        return latest_bytes + sum(len(delta) for _, delta in self._entries if delta)
+
+    @staticmethod
+    def _encode(delta) -> bytes:
+        return zlib.compress(json.dumps(delta, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _decode(payload: bytes):
+        return json.loads(zlib.decompress(payload))
@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+from datetime import datetime
+from ..models.schemas import DBSession
+
+class SessionStore(ABC):
+    """Storage interface for session records, implemented by each DB backend."""
+
+    @abstractmethod
+    def create_session_record(self, session_id: str) -> DBSession:
+        """Create a new session record."""
+
+    @abstractmethod
+    def get_session_record(self, session_id: str) -> Optional[DBSession]:
+        """Get session data by ID."""
+
+    def get_record_version(self, session_id: str) -> Optional[int]:
+        """Get the change counter of a session record, or None if it does not exist."""
+        session = self.get_session_record(session_id)
+        return session.version if session else None
+
+    def get_last_updated(self, session_id: str) -> Optional[datetime]:
+        """Get when a session was last used by any process, or None if it does not exist."""
+        session = self.get_session_record(session_id)
+        return session.last_updated if session else None
+
+    @abstractmethod
+    def touch_session_record(self, session_id: str) -> bool:
+        """Record that a session is in use without counting it as a data change."""
+
+    def get_resident_record(self, session_id: str) -> Optional[DBSession]:
+        """
+        Get a session record only if this process already holds it in memory.
+        Stores that load records on demand return None instead of loading it.
+        """
+        return None
+
+    @abstractmethod
+    def update_user_profile(self, session_id: str, user_profile: Dict[str, Any]) -> bool:
+        """Update the user profile for a session."""
+
+    @abstractmethod
+    def update_resume_markdown(self, session_id: str, resume_markdown: str, version: Optional[int]=None) -> bool:
+        """Save a resume version for a session."""
+
+    @abstractmethod
+    def get_resume_markdown(self, session_id: str, version: Optional[int]=None) -> Optional[str]:
+        """Get a resume version for a session, the latest one by default."""
+
+    @abstractmethod
+    def update_job_description(self, session_id: str, job_description: str) -> bool:
+        """Update job description for a session."""
+
+    @abstractmethod
+    def delete_session_record(self, session_id: str) -> bool:
+        """Delete a session."""
+
+    def delete_session_record_if_idle(self, session_id: str, cutoff: datetime) -> bool:
+        """Delete a session only if it was last updated before the cutoff."""
+        last_updated = self.get_last_updated(session_id)
+        if last_updated is None or last_updated >= cutoff:
+            return False
+        return self.delete_session_record(session_id)
+
+    def delete_records_before(self, cutoff: datetime) -> int:
+        """
+        Delete records last updated before the cutoff and return how many were removed.
+        Only needed by stores that outlive the process holding the sessions.
+        """
+        return 0
@@ -0,0 +1,234 @@
+from typing import Dict, Any, Iterator, Optional
+from contextlib import contextmanager
+from datetime import datetime
+import os
+import sqlite3
+import threading
+from ..models.schemas import UserProfileFile, DBSession
+from .session_store import SessionStore
+from .resume_version_store import ResumeVersionStore
+
+# Get configuration from environment variables with defaults
+MAX_RESUMES_PER_SESSION = int(os.getenv('MAX_RESUMES_PER_SESSION', 5))
+SQLITE_DB_PATH = os.getenv('SQLITE_DB_PATH', 'data/resume_builder.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    job_description TEXT,
+    profile_filename TEXT,
+    profile_content_type TEXT,
+    profile_size INTEGER,
+    profile_content TEXT,
+    profile_parsed_at TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_last_updated ON sessions (last_updated);
+CREATE TABLE IF NOT EXISTS resumes (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    resume_markdown TEXT NOT NULL,
+    PRIMARY KEY (session_id, version)
+) WITHOUT ROWID;
+"""
+
+# Statements are kept as constants so sqlite3's per-connection statement cache reuses them
+INSERT_SESSION = "INSERT INTO sessions (session_id, created_at, last_updated) VALUES (?, ?, ?)"
+SELECT_SESSION = "SELECT created_at, last_updated, job_description, profile_filename, profile_content_type, profile_size, profile_content, profile_parsed_at, version FROM sessions WHERE session_id = ?"
+SELECT_VERSION = "SELECT version FROM sessions WHERE session_id = ?"
+SELECT_LAST_UPDATED = "SELECT last_updated FROM sessions WHERE session_id = ?"
+UPDATE_PROFILE = "UPDATE sessions SET profile_filename = ?, profile_content_type = ?, profile_size = ?, profile_content = ?, profile_parsed_at = ?, last_updated = ?, version = version + 1 WHERE session_id = ?"
+UPDATE_JOB_DESCRIPTION = "UPDATE sessions SET job_description = ?, last_updated = ?, version = version + 1 WHERE session_id = ?"
+TOUCH_SESSION = "UPDATE sessions SET last_updated = ?, version = version + 1 WHERE session_id = ?"
+MARK_SESSION_USED = "UPDATE sessions SET last_updated = ? WHERE session_id = ?"
+DELETE_SESSION = "DELETE FROM sessions WHERE session_id = ?"
+DELETE_IDLE_SESSION = "DELETE FROM sessions WHERE session_id = ? AND last_updated < ?"
+DELETE_SESSIONS_BEFORE = "DELETE FROM sessions WHERE last_updated < ?"
+SELECT_RESUMES = "SELECT version, resume_markdown FROM resumes WHERE session_id = ? ORDER BY version"
+SELECT_RESUME = "SELECT resume_markdown FROM resumes WHERE session_id = ? AND version = ?"
+SELECT_LATEST_RESUME = "SELECT resume_markdown FROM resumes WHERE session_id = ? ORDER BY version DESC LIMIT 1"
+SELECT_LATEST_VERSION = "SELECT COALESCE(MAX(version), 0) FROM resumes WHERE session_id = ?"
+UPSERT_RESUME = "INSERT OR REPLACE INTO resumes (session_id, version, resume_markdown) VALUES (?, ?, ?)"
+SELECT_EXCESS_VERSIONS = "SELECT version FROM resumes WHERE session_id = ? ORDER BY version DESC LIMIT -1 OFFSET ?"
+DELETE_RESUME = "DELETE FROM resumes WHERE session_id = ? AND version = ?"
+
+class SQLiteDB(SessionStore):
+    """
+    Session store backed by a SQLite database in WAL mode, so several
+    uvicorn workers on one host can share sessions and survive restarts.
+    """
+
+    def __init__(self, db_path: str = SQLITE_DB_PATH):
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database file was first created."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if 'version' not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def batch(self) -> Iterator[sqlite3.Connection]:
+        """
+        Group writes into a single transaction. Nested batches join the
+        outermost one, which commits once on exit.
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.execute("COMMIT")
+
+    def create_session_record(self, session_id: str) -> DBSession:
+        """Create a new session record."""
+
+        if not session_id:
+            raise ValueError('Session id cannot be empty')
+
+        now = datetime.utcnow()
+        with self.batch() as conn:
+            conn.execute(INSERT_SESSION, (session_id, now.isoformat(), now.isoformat()))
+
+        return DBSession(
+            session_id=session_id,
+            created_at=now,
+            last_updated=now,
+            user_profile=None,
+            job_description=None,
+            resume_store=ResumeVersionStore(max_versions=MAX_RESUMES_PER_SESSION)
+        )
+
+    def get_session_record(self, session_id: str) -> Optional[DBSession]:
+        """Get session data by ID."""
+        with self._lock:
+            row = self._conn.execute(SELECT_SESSION, (session_id,)).fetchone()
+            if row is None:
+                return None
+            resume_rows = self._conn.execute(SELECT_RESUMES, (session_id,)).fetchall()
+
+        created_at, last_updated, job_description, filename, content_type, size, content, parsed_at, version = row
+        user_profile = None
+        if filename is not None:
+            user_profile = UserProfileFile(
+                filename=filename,
+                content_type=content_type,
+                size=size,
+                content=content,
+                parsed_at=datetime.fromisoformat(parsed_at)
+            )
+
+        return DBSession(
+            session_id=session_id,
+            created_at=datetime.fromisoformat(created_at),
+            last_updated=datetime.fromisoformat(last_updated),
+            user_profile=user_profile,
+            job_description=job_description,
+            resume_store=ResumeVersionStore.from_versions(dict(resume_rows), max_versions=MAX_RESUMES_PER_SESSION),
+            version=version
+        )
+
+    def get_record_version(self, session_id: str) -> Optional[int]:
+        """Get the change counter of a session without loading its data."""
+        with self._lock:
+            row = self._conn.execute(SELECT_VERSION, (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_last_updated(self, session_id: str) -> Optional[datetime]:
+        """Get when a session was last used by any worker, without loading its data."""
+        with self._lock:
+            row = self._conn.execute(SELECT_LAST_UPDATED, (session_id,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def touch_session_record(self, session_id: str) -> bool:
+        """Push back a session's last use, so other workers don't expire it. Leaves the version alone."""
+        with self.batch() as conn:
+            cursor = conn.execute(MARK_SESSION_USED, (datetime.utcnow().isoformat(), session_id))
+        return cursor.rowcount > 0
+
+    def update_user_profile(self, session_id: str, user_profile: Dict[str, Any]) -> bool:
+        """Update the user profile for a session."""
+        with self.batch() as conn:
+            cursor = conn.execute(UPDATE_PROFILE, (
+                user_profile["filename"],
+                user_profile["content_type"],
+                user_profile["size"],
+                user_profile["content"],
+                user_profile["parsed_at"],
+                datetime.utcnow().isoformat(),
+                session_id
+            ))
+        return cursor.rowcount > 0
+
+    def update_resume_markdown(self, session_id: str, resume_markdown: str, version: Optional[int]=None) -> bool:
+        """Save a resume version for a session, keeping at most MAX_RESUMES_PER_SESSION versions."""
+        with self.batch() as conn:
+            touched = conn.execute(TOUCH_SESSION, (datetime.utcnow().isoformat(), session_id))
+            if touched.rowcount == 0:
+                return False
+
+            if version is None:
+                version = conn.execute(SELECT_LATEST_VERSION, (session_id,)).fetchone()[0] + 1
+
+            conn.execute(UPSERT_RESUME, (session_id, version, resume_markdown))
+
+            # Enforce a maximum number of resumes
+            excess = conn.execute(SELECT_EXCESS_VERSIONS, (session_id, MAX_RESUMES_PER_SESSION)).fetchall()
+            conn.executemany(DELETE_RESUME, [(session_id, excess_version) for (excess_version,) in excess])
+
+        return True
+
+    def get_resume_markdown(self, session_id: str, version: Optional[int]=None) -> Optional[str]:
+        """Get a resume version for a session, the latest one by default."""
+        with self._lock:
+            if version is None:
+                row = self._conn.execute(SELECT_LATEST_RESUME, (session_id,)).fetchone()
+            else:
+                row = self._conn.execute(SELECT_RESUME, (session_id, version)).fetchone()
+
+        return row[0] if row else None
+
+    def update_job_description(self, session_id: str, job_description: str) -> bool:
+        """Update job description for a session."""
+        with self.batch() as conn:
+            cursor = conn.execute(UPDATE_JOB_DESCRIPTION, (job_description, datetime.utcnow().isoformat(), session_id))
+        return cursor.rowcount > 0
+
+    def delete_session_record(self, session_id: str) -> bool:
+        """Delete a session and its resume versions."""
+        with self.batch() as conn:
+            cursor = conn.execute(DELETE_SESSION, (session_id,))
+        return cursor.rowcount > 0
+
+    def delete_session_record_if_idle(self, session_id: str, cutoff: datetime) -> bool:
+        """Delete a session unless a worker used it since the cutoff."""
+        with self.batch() as conn:
+            cursor = conn.execute(DELETE_IDLE_SESSION, (session_id, cutoff.isoformat()))
+        return cursor.rowcount > 0
+
+    def delete_records_before(self, cutoff: datetime) -> int:
+        """Delete sessions last updated before the cutoff, including ones no worker has loaded."""
+        with self.batch() as conn:
+            cursor = conn.execute(DELETE_SESSIONS_BEFORE, (cutoff.isoformat(),))
+        return cursor.rowcount
@@ -0,0 +1,88 @@
+from typing import Awaitable, Callable
+import time
+
+FENCE = "```"
+
+class ResumeStreamFilter:
+    """
+    Extracts resume HTML from streamed builder output: drops any preamble
+    before the first tag and, when the HTML is wrapped in a ``` fence, stops
+    at the closing fence even if it is split across chunks.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._fenced = False
+        self._finished = False
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        """Return the part of the chunk that can be rendered now."""
+        if self._finished:
+            return ""
+
+        text = self._pending + chunk
+        self._pending = ""
+
+        if not self._started:
+            start = text.find("<")
+            if start == -1:
+                # Keep the preamble until the first tag shows up to know whether it opened a fence
+                self._pending = text
+                return ""
+            self._started = True
+            self._fenced = FENCE in text[:start]
+            text = text[start:]
+
+        if not self._fenced:
+            return text
+
+        end = text.find(FENCE)
+        if end != -1:
+            self._finished = True
+            return text[:end]
+
+        # Hold back a trailing partial fence until the next chunk shows what it is
+        for length in range(len(FENCE) - 1, 0, -1):
+            if text.endswith(FENCE[:length]):
+                self._pending = text[-length:]
+                return text[:-length]
+        return text
+
+class AgentStreamRelay:
+    """
+    Coalesces streamed model deltas and forwards them in small batches, so a
+    token-by-token stream doesn't become one WebSocket frame per token.
+    """
+
+    def __init__(self, send: Callable[[str, str], Awaitable[None]], flush_interval: float = 0.05, flush_size: int = 512):
+        self._send = send
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._buffers = {"chat": "", "resume": ""}
+        self._last_flush = time.monotonic()
+        self._resume_filter = ResumeStreamFilter()
+
+    async def feed_chat(self, delta: str) -> None:
+        """Queue user-facing message text."""
+        await self._feed("chat", delta)
+
+    async def feed_resume(self, delta: str) -> None:
+        """Queue raw builder output; only the resume HTML is forwarded."""
+        await self._feed("resume", self._resume_filter.feed(delta))
+
+    async def _feed(self, stream: str, delta: str) -> None:
+        if not delta:
+            return
+
+        self._buffers[stream] += delta
+        if len(self._buffers[stream]) >= self._flush_size or time.monotonic() - self._last_flush >= self._flush_interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send everything buffered so far."""
+        self._last_flush = time.monotonic()
+        for stream, buffered in self._buffers.items():
+            if buffered:
+                self._buffers[stream] = ""
+                await self._send(stream, buffered)
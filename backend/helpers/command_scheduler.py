@@ -0,0 +1,123 @@
+from typing import Any, AsyncContextManager, Awaitable, Callable, Deque, Dict, Optional
+from collections import deque
+import asyncio
+import os
+from .logger import get_logger
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+AGENT_RUN_TIMEOUT = float(os.getenv('AGENT_RUN_TIMEOUT', 300))  # seconds per command, 0 disables the deadline
+
+class CommandScheduler:
+    """
+    Runs the agent commands of one session in the background, one at a time,
+    so the WebSocket receive loop never waits on an LLM call.
+
+    - A `generate` is dropped while an identical one is queued, or running
+      against unchanged session data. If the data changed since the running
+      one started, that run is cancelled and a fresh one queued.
+    - Consecutive queued `user_message`s are merged into a single run.
+    - Each run is cancelled once it exceeds the deadline. The deadline
+      starts once the run is admitted, e.g. holds a generation worker, so
+      time spent queued behind other sessions does not count against it.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Dict[str, Any]], Awaitable[None]],
+        state_version: Callable[[], Optional[int]],
+        on_timeout: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        admit: Optional[Callable[[Dict[str, Any]], AsyncContextManager]] = None,
+        timeout: float = AGENT_RUN_TIMEOUT
+    ):
+        self._run = run
+        self._state_version = state_version
+        self._on_timeout = on_timeout
+        self._admit = admit
+        self._timeout = timeout if timeout > 0 else None
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._worker: Optional[asyncio.Task] = None
+        self._current: Optional[Dict[str, Any]] = None
+        self._current_version: Optional[int] = None
+        self._current_task: Optional[asyncio.Task] = None
+
+    @property
+    def busy(self) -> bool:
+        """Whether a command is running or queued."""
+        return self._current is not None or bool(self._queue)
+
+    def submit(self, message: Dict[str, Any]) -> bool:
+        """
+        Queue a command, coalescing it with pending work where possible.
+
+        Args:
+            message: The WebSocket message to run
+
+        Returns:
+            bool: False if the command was absorbed by work already pending
+        """
+        message_type = message.get("type")
+
+        if message_type == "generate":
+            if any(queued.get("type") == "generate" for queued in self._queue):
+                return False
+
+            if self._current is not None and self._current.get("type") == "generate":
+                if self._state_version() == self._current_version:
+                    return False
+                logger.info("Session data changed, restarting resume generation")
+                self._current_task.cancel()
+
+        elif message_type == "user_message" and self._queue and self._queue[-1].get("type") == "user_message":
+            queued = self._queue[-1]
+            self._queue[-1] = {**queued, "message": f"{queued.get('message', '')}\n{message.get('message', '')}"}
+            return False
+
+        self._queue.append(message)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return True
+
+    def cancel_all(self) -> None:
+        """Drop queued commands and cancel the running one."""
+        self._queue.clear()
+        if self._current_task is not None:
+            self._current_task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _drain(self) -> None:
+        while self._queue:
+            message = self._queue.popleft()
+            self._current = message
+            self._current_version = self._state_version()
+            self._current_task = asyncio.create_task(self._run_with_deadline(message))
+            try:
+                # wait() returns when the run is cancelled, but raises if the worker itself is
+                await asyncio.wait({self._current_task})
+            except asyncio.CancelledError:
+                self._current_task.cancel()
+                raise
+            finally:
+                self._current = None
+                self._current_version = None
+                self._current_task = None
+
+    async def _run_with_deadline(self, message: Dict[str, Any]) -> None:
+        try:
+            if self._admit is None:
+                await self._run_admitted(message)
+            else:
+                async with self._admit(message):
+                    await self._run_admitted(message)
+        except Exception as e:
+            logger.error(f"Command {message.get('type')} failed: {str(e)}")
+
+    async def _run_admitted(self, message: Dict[str, Any]) -> None:
+        try:
+            await asyncio.wait_for(self._run(message), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Command {message.get('type')} exceeded the {self._timeout}s deadline")
+            if self._on_timeout:
+                await self._on_timeout(message)
@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional, Tuple
+import heapq
+
+class ExpiryIndex:
+    """
+    Min-heap of (deadline, key) used to find expired sessions without scanning
+    all of them. Touching a key pushes a fresh entry; superseded entries are
+    skipped when they reach the top of the heap.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def touch(self, key: str, deadline: float) -> None:
+        """Set or move the deadline of a key."""
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+
+        # Superseded entries pile up when keys are touched often; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, key: str) -> None:
+        """Forget a key. Its heap entries are dropped lazily."""
+        self._deadlines.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[float]:
+        """Get the current deadline of a key."""
+        return self._deadlines.get(key)
+
+    def pop_expired(self, now: float, limit: Optional[int] = None) -> List[str]:
+        """
+        Remove and return keys whose deadline is at or before `now`, oldest first.
+
+        Args:
+            now: Current time on the same clock as the deadlines
+            limit: Optional. Maximum number of keys to return
+        """
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(expired) >= limit:
+                break
+
+            deadline, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                expired.append(key)
+
+        return expired
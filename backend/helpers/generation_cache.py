@@ -0,0 +1,95 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import os
+import re
+import time
+
+# Get configuration from environment variables with defaults
+GENERATION_CACHE_TTL = int(os.getenv('GENERATION_CACHE_TTL', 24 * 60 * 60))  # 24 hours default
+GENERATION_CACHE_MAX_BYTES = int(os.getenv('GENERATION_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 32MB default
+
+def normalize_job_description(job_description: str) -> str:
+    """Collapse whitespace so reformatted pastes of the same posting share a key."""
+    return re.sub(r'\s+', ' ', job_description).strip()
+
+def make_generation_cache_key(profile_content: str, job_description: str, model_provider: str, model_id: Optional[str], prompt_version: str) -> str:
+    """Build a cache key from everything that determines a generated resume."""
+    parts = [
+        hashlib.sha256(profile_content.strip().encode('utf-8')).hexdigest(),
+        hashlib.sha256(normalize_job_description(job_description).encode('utf-8')).hexdigest(),
+        model_provider,
+        model_id or "",
+        prompt_version
+    ]
+    return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+class GenerationCache:
+    """
+    LRU cache of generated resumes with a time to live, so regenerating from
+    unchanged inputs returns the earlier result without a model call.
+    """
+
+    def __init__(self, ttl: int = GENERATION_CACHE_TTL, max_bytes: int = GENERATION_CACHE_MAX_BYTES):
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        # key -> (expires at on the monotonic clock, resume)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached resume that has not expired and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, resume: str) -> None:
+        """Store a generated resume, evicting least recently used entries past the byte budget."""
+        size = len(resume.encode('utf-8'))
+        if size > self._max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self._ttl, resume)
+        self._sizes[key] = size
+        self._bytes += size
+
+        while self._bytes > self._max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def _remove(self, key: str) -> None:
+        del self._entries[key]
+        self._bytes -= self._sizes.pop(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current usage."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes
+        }
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+# Create a global instance shared by all sessions
+generation_cache = GenerationCache()
@@ -0,0 +1,39 @@
+from typing import Optional
+import re
+
+FENCED_BLOCK_PATTERN = re.compile(r'```[a-zA-Z]*\s*\n?(.*?)(?:```|$)', re.DOTALL)
+# A reply counts as a resume only if it contains block-level markup
+RESUME_TAG_PATTERN = re.compile(r'<(?:div|section|article|main|header|h1|h2|body|html)\b', re.IGNORECASE)
+
+def extract_resume_html(text: Optional[str]) -> Optional[str]:
+    """
+    Pull the resume HTML out of a model reply.
+
+    Drops markdown code fences and any prose before the first tag or after
+    the last one, preferring the `<div id="resume">` container when present.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        str: The cleaned HTML, or None if the reply contains no resume markup
+    """
+    if not text:
+        return None
+
+    fenced = FENCED_BLOCK_PATTERN.search(text)
+    if fenced and RESUME_TAG_PATTERN.search(fenced.group(1)):
+        text = fenced.group(1)
+
+    match = RESUME_TAG_PATTERN.search(text)
+    if not match:
+        return None
+
+    start = text.find('<div id="resume"')
+    if start == -1:
+        start = match.start()
+    end = text.rfind('>')
+    if end < start:
+        return None
+
+    return text[start:end + 1].strip()
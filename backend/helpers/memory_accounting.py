@@ -0,0 +1,90 @@
+from typing import Any, Dict, Iterable, Optional
+from collections import deque
+import asyncio
+import logging
+import sys
+import types
+from agno.models.base import Model
+from fastapi import WebSocket
+
+# Objects shared across sessions or owned by the runtime; never counted towards a session
+SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.MethodType,
+    types.BuiltinFunctionType,
+    Model,
+    WebSocket,
+    asyncio.AbstractEventLoop,
+    asyncio.Future,
+    logging.Logger,
+)
+
+def deep_sizeof(obj: Any, exclude: Iterable[Any] = ()) -> int:
+    """
+    Estimate the memory held by an object graph with `sys.getsizeof`.
+
+    Follows containers, instance `__dict__`s and `__slots__`, counting each
+    object once. Shared runtime objects (models, functions, sockets, event
+    loop machinery) and anything in `exclude` are not followed.
+
+    Args:
+        obj: Root of the object graph
+        exclude: Objects to skip, e.g. managers referenced by the graph
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    seen = {id(item) for item in exclude}
+    pending = deque([obj])
+    total = 0
+
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen or isinstance(current, SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current, 0)
+
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)):
+            continue
+        if isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+            continue
+        if isinstance(current, (list, tuple, set, frozenset, deque)):
+            pending.extend(current)
+            continue
+
+        attributes = getattr(current, '__dict__', None)
+        if attributes is not None:
+            pending.append(attributes)
+        for slot in getattr(type(current), '__slots__', ()):
+            if isinstance(slot, str) and slot not in ('__dict__', '__weakref__'):
+                pending.append(getattr(current, slot, None))
+
+    return total
+
+def estimate_session_memory(session: Any, record: Optional[Any] = None, exclude: Iterable[Any] = ()) -> Dict[str, int]:
+    """
+    Estimate the memory a session holds, by component.
+
+    Args:
+        session: The in-process `SessionData`
+        record: Optional. The session's `DBSession`, if it is held in this process
+        exclude: Objects the session references but does not own
+
+    Returns:
+        Dict[str, int]: Bytes for profile, job_description, resume_store, team,
+        websocket_handler and their total
+    """
+    usage = {
+        "profile": deep_sizeof(record.user_profile) if record is not None else 0,
+        "job_description": sys.getsizeof(record.job_description) if record is not None and record.job_description else 0,
+        "resume_store": record.resume_store.nbytes() if record is not None else 0,
+        "team": deep_sizeof(session.resume_team, exclude=exclude),
+        "websocket_handler": deep_sizeof(session.websocket_handler, exclude=exclude),
+    }
+    usage["total"] = sum(usage.values())
+    return usage
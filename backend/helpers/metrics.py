@@ -0,0 +1,129 @@
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+from bisect import bisect_left
+from contextlib import contextmanager
+import functools
+import inspect
+import threading
+import time
+from .tracing import tracer
+
+# Upper bounds in seconds, from socket writes (ms) up to full agent runs (minutes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+class Histogram:
+    """
+    Prometheus-style histogram keyed by label values.
+
+    Observing costs one bisect and a few increments under a lock; cumulative
+    bucket counts are only computed when the metrics are rendered.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record one observation for the given label values, in label_names order."""
+        index = bisect_left(self.buckets, value)
+        label_values = tuple(str(label) for label in label_values)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values: str):
+        """Observe the wall time of the enclosed block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+
+        for label_values, counts, total, count in sorted(series):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values))
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class MetricsRegistry:
+    """Holds the process's histograms and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Get or create a histogram by name."""
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, documentation, label_names, buckets)
+        return self._histograms[name]
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+# Create a global registry and the hot-path histograms
+metrics = MetricsRegistry()
+HTTP_REQUEST_SECONDS = metrics.histogram("http_request_duration_seconds", "Time to handle an HTTP request, by route template", ("method", "route", "status"))
+WEBSOCKET_MESSAGE_SECONDS = metrics.histogram("websocket_message_duration_seconds", "Time to handle an incoming WebSocket message, by type; agent commands are timed from start to completion", ("type",))
+WEBSOCKET_SEND_SECONDS = metrics.histogram("websocket_send_duration_seconds", "Time to write one outgoing WebSocket event, by type", ("type",))
+TOOL_CALL_SECONDS = metrics.histogram("agent_tool_call_duration_seconds", "Time spent in a session tool called by the agents", ("tool",))
+MODEL_CALL_SECONDS = metrics.histogram("model_call_duration_seconds", "Time of a model call after admission, until the last chunk for streams", ("provider", "model", "stream"))
+MODEL_FIRST_CHUNK_SECONDS = metrics.histogram("model_first_chunk_seconds", "Time from the start of a streamed model call to its first chunk", ("provider", "model"))
+MODEL_QUEUE_SECONDS = metrics.histogram("model_queue_wait_seconds", "Time a model call waited for admission by the LLM scheduler")
+GENERATION_QUEUE_SECONDS = metrics.histogram("generation_queue_wait_seconds", "Time an agent run or batch item waited for a GENERATION_WORKERS slot")
+
+def timed_tool(func: Callable) -> Callable:
+    """
+    Record a tool method's latency under its name, and trace the call with its
+    argument and result sizes. Keeps the signature and docstring, which agno
+    uses to describe the tool to the model.
+    """
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with TOOL_CALL_SECONDS.time(name), tracer.span(name, "tool", args_chars=_payload_chars(args[1:], kwargs)) as span:
+                result = await func(*args, **kwargs)
+                if span is not None:
+                    span.set(result_chars=_payload_chars((result,), {}))
+                return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with TOOL_CALL_SECONDS.time(name), tracer.span(name, "tool", args_chars=_payload_chars(args[1:], kwargs)) as span:
+            result = func(*args, **kwargs)
+            if span is not None:
+                span.set(result_chars=_payload_chars((result,), {}))
+            return result
+    return wrapper
+
+def _payload_chars(args: Sequence[Any], kwargs: Dict[str, Any]) -> int:
+    return sum(len(str(value)) for value in (*args, *kwargs.values()) if value is not None)
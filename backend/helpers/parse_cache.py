@@ -0,0 +1,71 @@
+from typing import Dict, Optional
+from collections import OrderedDict
+import os
+
+# Get configuration from environment variables with defaults
+PARSE_CACHE_MAX_BYTES = int(os.getenv('PARSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64MB default
+
+def make_parse_cache_key(file_digest: str, file_type: str) -> str:
+    """Build a cache key from the SHA-256 hex digest of the file bytes and its type."""
+    return f"{file_type}:{file_digest}"
+
+class ParseCache:
+    """
+    LRU cache of extracted document text keyed by file content hash and type.
+    Shared across sessions so re-uploading the same file skips parsing.
+    """
+
+    def __init__(self, max_bytes: int = PARSE_CACHE_MAX_BYTES):
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the cached text for a key and mark it as recently used."""
+        text = self._entries.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Store extracted text, evicting least recently used entries past the byte budget."""
+        size = len(text.encode('utf-8'))
+        if size > self._max_bytes:
+            return
+
+        if key in self._entries:
+            self._bytes -= self._sizes[key]
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        self._bytes += size
+
+        while self._bytes > self._max_bytes:
+            oldest_key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(oldest_key)
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and current usage."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes
+        }
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+# Create a global instance shared by all sessions
+parse_cache = ParseCache()
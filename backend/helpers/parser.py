@@ -1,61 +1,122 @@
-from typing import Optional
+from typing import BinaryIO, Iterator, List, Optional, Union
 import docx
 import PyPDF2
 import io
-import logging
+import os
 from .logger import get_logger
 logger = get_logger(__name__)
 
+# Get configuration from environment variables with defaults
+PARSER_MAX_PAGES = int(os.getenv('PARSER_MAX_PAGES', 50))  # PDF pages accepted per file, 0 for no limit
+
+class PageLimitExceededError(ValueError):
+    """Raised when a PDF has more pages than the parser accepts."""
+
 class DocumentParser:
     @staticmethod
-    def parse_file(file_content: bytes, file_type: str) -> Optional[str]:
+    def parse_file(file_content: Union[bytes, str], file_type: str, max_pages: int = PARSER_MAX_PAGES, max_chars: Optional[int] = None) -> Optional[str]:
         """
         Parse the uploaded file and extract text content.
         
         Args:
-            file_content: Raw bytes of the uploaded file
+            file_content: Raw bytes of the uploaded file, or the path of a file holding them
             file_type: File extension (pdf, docx, txt)
+            max_pages: Maximum number of PDF pages accepted, 0 for no limit
+            max_chars: Optional. Stop reading once this many characters are collected
             
         Returns:
             Extracted text content or None if parsing fails
+        
+        Raises:
+            PageLimitExceededError: If the PDF has more than max_pages pages
         """
         try:
+            pieces = []
+            collected = 0
+            
+            for piece in DocumentParser.iter_pages(file_content, file_type, max_pages=max_pages):
+                pieces.append(piece)
+                collected += len(piece)
+                if max_chars and collected >= max_chars:
+                    break
+            
+            text = "\n".join(pieces)
+            return text if file_type == 'txt' else text.strip()
+        
+        except PageLimitExceededError:
+            raise
+        except Exception as e:
+            logger.error(f"Error parsing file: {str(e)}")
+            return None
+    
+    @staticmethod
+    def iter_pages(file_content: Union[bytes, str], file_type: str, max_pages: int = PARSER_MAX_PAGES) -> Iterator[str]:
+        """
+        Lazily yield the text of a document piece by piece: pages for PDF,
+        paragraphs for DOCX and the whole text for TXT.
+        
+        Args:
+            file_content: Raw bytes of the uploaded file, or the path of a file holding them
+            file_type: File extension (pdf, docx, txt)
+            max_pages: Maximum number of PDF pages accepted, 0 for no limit
+        
+        Raises:
+            PageLimitExceededError: If the PDF has more than max_pages pages
+        """
+        with DocumentParser._open(file_content) as file_stream:
             if file_type == 'txt':
-                return file_content.decode('utf-8')
+                yield file_stream.read().decode('utf-8')
             
             elif file_type == 'pdf':
-                return DocumentParser._parse_pdf(file_content)
+                yield from DocumentParser._iter_pdf_pages(file_stream, 0, None, max_pages=max_pages)
             
             elif file_type == 'docx':
-                return DocumentParser._parse_docx(file_content)
+                for paragraph in docx.Document(file_stream).paragraphs:
+                    yield paragraph.text
             
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
-                
+    
+    @staticmethod
+    def count_pdf_pages(file_content: Union[bytes, str]) -> Optional[int]:
+        """Get the number of pages in a PDF, or None if it cannot be read."""
+        try:
+            with DocumentParser._open(file_content) as file_stream:
+                return len(PyPDF2.PdfReader(file_stream).pages)
         except Exception as e:
-            logger.error(f"Error parsing file: {str(e)}")
+            logger.error(f"Error reading PDF: {str(e)}")
             return None
     
     @staticmethod
-    def _parse_pdf(file_content: bytes) -> str:
-        """Extract text from PDF file."""
-        pdf_file = io.BytesIO(file_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-            
-        return text.strip()
+    def extract_pdf_pages(file_content: Union[bytes, str], start: int, stop: int) -> Optional[List[str]]:
+        """Extract the text of PDF pages [start, stop), or None if extraction fails."""
+        try:
+            with DocumentParser._open(file_content) as file_stream:
+                return list(DocumentParser._iter_pdf_pages(file_stream, start, stop))
+        except Exception as e:
+            logger.error(f"Error parsing PDF pages {start}-{stop}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def check_page_limit(page_count: int, max_pages: int = PARSER_MAX_PAGES) -> None:
+        """Reject a PDF longer than max_pages rather than silently dropping its later pages."""
+        if max_pages and page_count > max_pages:
+            raise PageLimitExceededError(f"PDF has {page_count} pages, the maximum is {max_pages}")
     
     @staticmethod
-    def _parse_docx(file_content: bytes) -> str:
-        """Extract text from DOCX file."""
-        docx_file = io.BytesIO(file_content)
-        doc = docx.Document(docx_file)
-        text = ""
+    def _open(file_content: Union[bytes, str]) -> BinaryIO:
+        """Open the content as a binary stream without copying in-memory bytes."""
+        if isinstance(file_content, str):
+            return open(file_content, 'rb')
+        return io.BytesIO(file_content)
+    
+    @staticmethod
+    def _iter_pdf_pages(file_stream: BinaryIO, start: int, stop: Optional[int], max_pages: int = 0) -> Iterator[str]:
+        """Yield the text of PDF pages [start, stop) one at a time, after checking the page limit."""
+        pdf_reader = PyPDF2.PdfReader(file_stream)
+        page_count = len(pdf_reader.pages)
+        DocumentParser.check_page_limit(page_count, max_pages)
+        stop = page_count if stop is None else min(stop, page_count)
         
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-            
-        return text.strip() 
\ No newline at end of file
+        for page_number in range(start, stop):
+            yield pdf_reader.pages[page_number].extract_text()
@@ -0,0 +1,122 @@
+from typing import Dict, List, Optional, Union
+import json
+import os
+import re
+import time
+
+# Get configuration from environment variables with defaults
+TEXT_DELTA_MAX_CHARS = int(os.getenv('TEXT_DELTA_MAX_CHARS', 200000))  # combined size of two texts beyond which they are not diffed
+TEXT_DELTA_TIME_LIMIT_MS = float(os.getenv('TEXT_DELTA_TIME_LIMIT_MS', 20))  # time a diff may take before it is abandoned
+
+# Tokens end after a tag's ">" or a newline, so edits to one bullet only touch a few tokens
+TOKEN_PATTERN = re.compile(r'[^\n>]*(?:>|\n)|[^\n>]+$')
+
+# Base positions remembered per distinct token, and tokens compared per candidate before picking one
+MATCH_CANDIDATES = 8
+MATCH_PROBE_TOKENS = 64
+# Shorter matches are inserted literally, since a copy op costs about as much
+MIN_COPY_CHARS = 16
+
+Delta = List[List[Union[str, int]]]
+
+def split_tokens(text: str) -> List[str]:
+    """Split HTML text into tokens that concatenate back to the exact input."""
+    return TOKEN_PATTERN.findall(text)
+
+def _run_length(base_tokens: List[str], base_start: int, target_tokens: List[str], target_start: int, limit: int) -> int:
+    limit = min(limit, len(base_tokens) - base_start, len(target_tokens) - target_start)
+    length = 0
+    while length < limit and base_tokens[base_start + length] == target_tokens[target_start + length]:
+        length += 1
+    return length
+
+def diff_text(base: str, target: str, max_size: Optional[int] = None) -> Optional[Delta]:
+    """
+    Compute ops that rebuild `target` from `base`.
+
+    Each op is either ["=", start, end], copying base tokens [start, end),
+    or ["+", text], inserting literal text. Matching is greedy over whole
+    tokens, preferring to continue the previous copy, so the cost is linear
+    in the size of the texts.
+
+    Args:
+        max_size: Optional. Give up once the ops would take this many characters as JSON
+
+    Returns:
+        Delta: The ops, or None when the texts exceed TEXT_DELTA_MAX_CHARS, the
+        diff exceeds TEXT_DELTA_TIME_LIMIT_MS or the ops reach max_size
+    """
+    if len(base) + len(target) > TEXT_DELTA_MAX_CHARS:
+        return None
+    deadline = time.perf_counter() + TEXT_DELTA_TIME_LIMIT_MS / 1000
+
+    base_tokens = split_tokens(base)
+    target_tokens = split_tokens(target)
+    positions: Dict[str, List[int]] = {}
+    for index, token in enumerate(base_tokens):
+        if len(token) < MIN_COPY_CHARS:
+            # Short tokens like "<li>" or a newline are everywhere; they only extend the previous copy
+            continue
+        occurrences = positions.setdefault(token, [])
+        if len(occurrences) < MATCH_CANDIDATES:
+            occurrences.append(index)
+
+    delta: Delta = []
+    # Length of json.dumps(delta), kept up to date as ops are added
+    size = 2
+    literal: List[str] = []
+    next_base = 0
+    index = 0
+    while index < len(target_tokens):
+        if index % 256 == 0 and time.perf_counter() > deadline:
+            return None
+
+        token = target_tokens[index]
+        candidates = positions.get(token, [])
+        if next_base < len(base_tokens) and base_tokens[next_base] == token:
+            candidates = [next_base] + candidates
+
+        best_start, best_length = None, 0
+        for start in candidates:
+            length = _run_length(base_tokens, start, target_tokens, index, MATCH_PROBE_TOKENS)
+            if length > best_length:
+                best_start, best_length = start, length
+
+        if best_start is not None and best_length == MATCH_PROBE_TOKENS:
+            best_length += _run_length(base_tokens, best_start + best_length, target_tokens, index + best_length, len(target_tokens))
+
+        if best_start is None or sum(len(matched) for matched in target_tokens[index:index + best_length]) < MIN_COPY_CHARS:
+            literal.append(token)
+            index += 1
+            continue
+
+        if literal:
+            size += _add_op(delta, ["+", "".join(literal)])
+            literal = []
+        size += _add_op(delta, ["=", best_start, best_start + best_length])
+        if max_size is not None and size >= max_size:
+            return None
+        next_base = best_start + best_length
+        index += best_length
+
+    if literal:
+        size += _add_op(delta, ["+", "".join(literal)])
+    if max_size is not None and size >= max_size:
+        return None
+    return delta
+
+def _add_op(delta: Delta, op: List[Union[str, int]]) -> int:
+    """Append an op and return how much it grows the JSON encoding of the delta."""
+    delta.append(op)
+    return len(json.dumps(op)) + (2 if len(delta) > 1 else 0)
+
+def apply_delta(base: str, delta: Delta) -> str:
+    """Rebuild the target text from `base` and ops produced by diff_text."""
+    base_tokens = split_tokens(base)
+    pieces = []
+    for op in delta:
+        if op[0] == "=":
+            pieces.extend(base_tokens[op[1]:op[2]])
+        else:
+            pieces.append(op[1])
+    return "".join(pieces)
@@ -0,0 +1,233 @@
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from uuid import uuid4
+import json
+import os
+import queue
+import threading
+import time
+from .logger import get_logger
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+AGENT_TRACING = os.getenv('AGENT_TRACING', 'true') == 'true'
+TRACE_SINK_PATH = os.getenv('TRACE_SINK_PATH', '')  # JSONL file traces are appended to; empty keeps traces in memory only
+TRACE_SINK_MAX_BYTES = int(os.getenv('TRACE_SINK_MAX_BYTES', 10 * 1024 * 1024))  # size at which the file is rotated to <path>.1, 0 never rotates
+TRACE_SINK_QUEUE_SIZE = 1000  # traces waiting for the writer thread before new ones are dropped
+TRACES_PER_SESSION = int(os.getenv('TRACES_PER_SESSION', 20))
+
+class Span:
+    """A timed step of an agent run with attributes and child spans."""
+
+    def __init__(self, name: str, kind: str, **attributes: Any):
+        self.name = name
+        self.kind = kind
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.children: List['Span'] = []
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        # Open turn of an agent scope; its model requests and tool calls nest under it
+        self.turn: Optional['Span'] = None
+        self.turns = 0
+        self._started = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def child(self, name: str, kind: str, **attributes: Any) -> 'Span':
+        span = Span(name, kind, **attributes)
+        self.children.append(span)
+        return span
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.turn is not None:
+            self.turn.finish()
+            self.turn = None
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if error is not None and self.error is None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children]
+        }
+
+# Innermost agent scope (the run or a member run) of the current task
+current_scope: ContextVar[Optional[Span]] = ContextVar('current_scope', default=None)
+
+class Tracer:
+    """
+    Records a span tree per agent run: run -> turn -> member run -> turn ->
+    model request / tool call. A turn is one model request of an agent plus
+    everything it triggers before the agent's next request.
+
+    Finished traces are kept per session for the API and, if a sink path is
+    configured, appended to a JSONL file (one trace per line) by a writer
+    thread, so agent runs never wait on disk. The file is rotated once it
+    reaches the size limit, keeping one previous file.
+    """
+
+    def __init__(self, enabled: bool = AGENT_TRACING, sink_path: str = TRACE_SINK_PATH, traces_per_session: int = TRACES_PER_SESSION, sink_max_bytes: int = TRACE_SINK_MAX_BYTES):
+        self.enabled = enabled
+        self._sink_path = sink_path
+        self._sink_max_bytes = sink_max_bytes
+        self._traces_per_session = max(1, traces_per_session)
+        self._traces: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._sink_queue: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue(maxsize=TRACE_SINK_QUEUE_SIZE)
+        self._sink_thread: Optional[threading.Thread] = None
+        self._sink_start_lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, session_id: str, **attributes: Any):
+        """Trace an agent run as the root of a new span tree."""
+        if not self.enabled:
+            yield None
+            return
+
+        root = Span(name, "run", **attributes)
+        token = current_scope.set(root)
+        error = None
+        try:
+            yield root
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            current_scope.reset(token)
+            root.finish(error)
+            self._store(session_id, {"trace_id": str(uuid4()), "session_id": session_id, **root.to_dict()})
+
+    @contextmanager
+    def scope(self, name: str, **attributes: Any):
+        """Trace a member run; its turns nest under the current turn of the enclosing agent."""
+        parent = current_scope.get()
+        if parent is None:
+            yield None
+            return
+
+        span = (parent.turn or parent).child(name, "member_run", **attributes)
+        token = current_scope.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            try:
+                current_scope.reset(token)
+            except ValueError:
+                # An abandoned stream can be closed from another context
+                pass
+            span.finish(error)
+
+    async def scope_stream(self, name: str, stream: AsyncIterator[Any], **attributes: Any) -> AsyncIterator[Any]:
+        """Trace a streamed member run for as long as its events are consumed."""
+        with self.scope(name, **attributes):
+            async for event in stream:
+                yield event
+
+    def start_turn(self, **attributes: Any) -> None:
+        """Close the current agent's open turn and start the next one."""
+        scope = current_scope.get()
+        if scope is None:
+            return
+
+        if scope.turn is not None:
+            scope.turn.finish()
+        scope.turns += 1
+        scope.turn = scope.child(f"turn {scope.turns}", "turn", **attributes)
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes: Any):
+        """Trace a model request or tool call under the current turn."""
+        scope = current_scope.get()
+        if scope is None:
+            yield None
+            return
+
+        span = (scope.turn or scope).child(name, kind, **attributes)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            span.finish(error)
+
+    def get_traces(self, session_id: str) -> List[Dict[str, Any]]:
+        """Get the session's recent traces, oldest first."""
+        return list(self._traces.get(session_id, ()))
+
+    def forget(self, session_id: str) -> None:
+        self._traces.pop(session_id, None)
+
+    def close(self) -> None:
+        """Write out queued traces and stop the writer thread."""
+        if self._sink_thread is None:
+            return
+
+        self._sink_queue.put(None)
+        self._sink_thread.join(timeout=5)
+        self._sink_thread = None
+
+    def _store(self, session_id: str, trace: Dict[str, Any]) -> None:
+        self._traces.setdefault(session_id, deque(maxlen=self._traces_per_session)).append(trace)
+        if not self._sink_path:
+            return
+
+        with self._sink_start_lock:
+            if self._sink_thread is None:
+                self._sink_thread = threading.Thread(target=self._write_traces, name="trace-sink", daemon=True)
+                self._sink_thread.start()
+
+        try:
+            self._sink_queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning("Trace sink is falling behind, dropping a trace")
+
+    def _write_traces(self) -> None:
+        """Writer thread: append queued traces to the sink file, rotating it by size."""
+        sink = None
+        while True:
+            trace = self._sink_queue.get()
+            if trace is None:
+                break
+
+            try:
+                if sink is None:
+                    directory = os.path.dirname(self._sink_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    sink = open(self._sink_path, 'a', encoding='utf-8')
+
+                sink.write(json.dumps(trace, default=str) + "\n")
+                sink.flush()
+
+                if self._sink_max_bytes > 0 and sink.tell() >= self._sink_max_bytes:
+                    sink.close()
+                    sink = None
+                    os.replace(self._sink_path, f"{self._sink_path}.1")
+            except OSError as e:
+                logger.error(f"Failed to write trace: {str(e)}")
+                if sink is not None:
+                    sink.close()
+                    sink = None
+
+        if sink is not None:
+            sink.close()
+
+# Create a global instance of the tracer
+tracer = Tracer()
@@ -0,0 +1,90 @@
+from typing import Optional, Union
+from fastapi import UploadFile
+import hashlib
+import os
+import tempfile
+
+# Get configuration from environment variables with defaults
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 64 * 1024))  # 64KB per read
+UPLOAD_SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 512 * 1024))  # spool to disk past 512KB
+
+class UploadTooLargeError(Exception):
+    """Raised as soon as an upload crosses the allowed size."""
+
+class SpooledUpload:
+    """
+    Content of an upload read in chunks. Small uploads stay in memory, larger
+    ones live in a temporary file that parser workers open by path.
+    """
+
+    def __init__(self, size: int, digest: str, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.size = size
+        self.digest = digest
+        self.data = data
+        self.path = path
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """Raw bytes for in-memory uploads, otherwise the temp file path."""
+        return self.path if self.path is not None else self.data
+
+    def close(self) -> None:
+        """Remove the spooled temp file, if any."""
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self.data = None
+
+async def read_upload(file: UploadFile, max_size: int, chunk_size: int = UPLOAD_CHUNK_SIZE, spool_threshold: int = UPLOAD_SPOOL_THRESHOLD) -> SpooledUpload:
+    """
+    Read an upload in chunks, hashing as it goes and aborting once it exceeds max_size.
+
+    Args:
+        file: The uploaded file
+        max_size: Maximum allowed size in bytes
+        chunk_size: Bytes read per chunk
+        spool_threshold: Size after which content is written to a temp file instead of memory
+
+    Returns:
+        SpooledUpload holding the size, SHA-256 hex digest and content location
+    """
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+    temp_file = None
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(f"Upload exceeds {max_size} bytes")
+
+            hasher.update(chunk)
+            if temp_file is None and size > spool_threshold:
+                temp_file = tempfile.NamedTemporaryFile(prefix='upload-', delete=False)
+                temp_file.write(buffer)
+                buffer = bytearray()
+
+            if temp_file is not None:
+                temp_file.write(chunk)
+            else:
+                buffer.extend(chunk)
+
+    except BaseException:
+        if temp_file is not None:
+            temp_file.close()
+            os.unlink(temp_file.name)
+        raise
+
+    if temp_file is not None:
+        temp_file.close()
+        return SpooledUpload(size=size, digest=hasher.hexdigest(), path=temp_file.name)
+
+    return SpooledUpload(size=size, digest=hasher.hexdigest(), data=bytes(buffer))
@@ -1,5 +1,25 @@
-from typing import Dict, Any, Optional
+from typing import Deque, Dict, Any, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from uuid import uuid4
 from fastapi import WebSocket
+from .text_delta import Delta, diff_text
+from .command_scheduler import CommandScheduler
+from .metrics import WEBSOCKET_MESSAGE_SECONDS, WEBSOCKET_SEND_SECONDS
+from .logger import get_logger
+from ..agents.generation import run_generation
+from ..managers.job_manager import Job, job_manager
+import asyncio
+import os
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+EVENT_REPLAY_BUFFER = int(os.getenv('EVENT_REPLAY_BUFFER', 64))  # sent events kept per session for replay on reconnect
+RESUME_PATCH_MAX_CHARS = int(os.getenv('RESUME_PATCH_MAX_CHARS', 50000))  # larger resumes are always sent in full
+RESUME_PATCH_MAX_LENGTH_CHANGE = float(os.getenv('RESUME_PATCH_MAX_LENGTH_CHANGE', 0.5))  # length change, as a share of the new resume, beyond which it is sent in full
+
+# Superseded by a later event (the final message or resume, the next position), so never replayed
+UNSEQUENCED_EVENTS = ("connected", "agent_response_delta", "resume_delta", "queue_position")
 
 class WebSocketHandler:
     """
@@ -10,9 +30,75 @@ class WebSocketHandler:
         self.session_id = session_id
         self.websocket = websocket
         self.session_manager = session_manager
+        # Resume version the connected client confirmed it has; patches are computed against it
+        self.acked_resume_version: Optional[int] = None
+        # Sequence numbers restart with each handler, so clients only resume within the same epoch
+        self.epoch = uuid4().hex[:8]
+        self._seq = 0
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max(1, EVENT_REPLAY_BUFFER))
+        # Created on first send so it binds to the running event loop
+        self._send_lock: Optional[asyncio.Lock] = None
+        # Agent commands run in the background so the receive loop stays responsive
+        self.scheduler = CommandScheduler(
+            run=self._run_command,
+            state_version=lambda: self.session_manager.get_session_version(self.session_id),
+            on_timeout=self._handle_command_timeout,
+            admit=self._admit_command
+        )
     
     def set_websocket(self, websocket: WebSocket):
         self.websocket = websocket
+        # A new connection starts from an empty preview
+        self.acked_resume_version = None
+    
+    def handle_disconnect(self, websocket: WebSocket) -> None:
+        """
+        Detach the closed socket. Agent jobs keep running and their results
+        are delivered when the client reconnects.
+        
+        Args:
+            websocket: The WebSocket connection that closed
+        """
+        # A reconnect may already have replaced the socket
+        if self.websocket is not websocket:
+            return
+        
+        self.websocket = None
+    
+    def _get_send_lock(self) -> asyncio.Lock:
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+        return self._send_lock
+    
+    async def _send_json(self, payload: Dict[str, Any]) -> bool:
+        """
+        Number the event and keep it for replay, then send it to the connected
+        client. Events are kept even when no client is connected.
+        
+        Returns:
+            bool: Whether the event reached a connected client
+        """
+        if payload.get("type") not in UNSEQUENCED_EVENTS:
+            self._seq += 1
+            payload = {**payload, "seq": self._seq}
+            self._events.append(payload)
+        
+        async with self._get_send_lock():
+            return await self._write(payload)
+    
+    async def _write(self, payload: Dict[str, Any]) -> bool:
+        websocket = self.websocket
+        if not websocket:
+            return False
+        
+        try:
+            with WEBSOCKET_SEND_SECONDS.time(payload.get("type", "unknown")):
+                await websocket.send_json(payload)
+        except Exception as e:
+            # The client went away mid-run; the job carries on without it
+            logger.info(f"Dropping {payload.get('type')} event for session {self.session_id}: {str(e)}")
+            return False
+        return True
     
     async def handle_message(self, message: Dict[str, Any]) -> None:
         """
@@ -29,25 +115,183 @@ class WebSocketHandler:
         message_handler = {
             "connect": self._handle_connect,
             "generate": self._handle_generate,
-            "user_message": self._handle_user_message
+            "user_message": self._handle_user_message,
+            "resume_ack": self._handle_resume_ack,
+            "resume_resync": self._handle_resume_resync,
+            "subscribe_job": self._handle_subscribe_job
+        }
+        
+        if message_type in ("generate", "user_message"):
+            await self.send_job_update(self.submit_job(message))
+        elif message_type in message_handler:
+            with WEBSOCKET_MESSAGE_SECONDS.time(message_type):
+                await message_handler[message_type](message)
+    
+    def submit_job(self, message: Dict[str, Any]) -> Optional[Job]:
+        """
+        Queue an agent command as a background job of the session.
+        
+        Args:
+            message: A generate or user_message command
+        
+        Returns:
+            Job: The new job, or the pending job that absorbed the command.
+            None if the session no longer exists
+        """
+        session = self.session_manager.get_session(self.session_id)
+        if not session:
+            return None
+        
+        message_type = message.get("type")
+        job = job_manager.create_job(session, session_id=self.session_id, kind=message_type)
+        if self.scheduler.submit({**message, "job_id": job.job_id}):
+            return job
+        
+        # An identical generate or a queued user message already covers it
+        job_manager.discard_job(session, job)
+        return job_manager.find_active_job(session, message_type)
+    
+    def _get_job(self, job_id: Optional[str]) -> Optional[Job]:
+        return job_manager.get_job(self.session_manager.get_session(self.session_id), job_id)
+    
+    @asynccontextmanager
+    async def _admit_command(self, message: Dict[str, Any]):
+        """Hold a generation worker for a command's job and report the job's progress."""
+        job = self._get_job(message.get("job_id"))
+        try:
+            async with job_manager.run(job):
+                await self.send_job_update(job)
+                yield
+        finally:
+            await self.send_job_update(job)
+    
+    async def _run_command(self, message: Dict[str, Any]) -> None:
+        message_type = message.get("type")
+        job = self._get_job(message.get("job_id"))
+        version = self.session_manager.get_latest_resume_version(self.session_id)
+        with WEBSOCKET_MESSAGE_SECONDS.time(message_type):
+            if message_type == "generate":
+                await self._handle_generate(message)
+            else:
+                await self._handle_user_message(message)
+        
+        latest = self.session_manager.get_latest_resume_version(self.session_id)
+        if job is not None and latest != version:
+            job.version = latest
+    
+    async def _handle_command_timeout(self, message: Dict[str, Any]) -> None:
+        # Recording the error on the job makes it finish as failed
+        await self._send_command_error(message, "This is taking longer than expected. Please try again")
+    
+    async def _send_command_error(self, message: Dict[str, Any], text: str) -> None:
+        """Send an error for an agent command and record it on the command's job."""
+        job = self._get_job(message.get("job_id"))
+        if job is not None:
+            job.error = text
+        
+        await self._send_json({
+            "type": "error",
+            "message": text
+        })
+    
+    async def send_job_update(self, job: Optional[Job], replayed: bool = False) -> None:
+        """
+        Sends the status of a job, marking finished jobs delivered once sent
+        
+        Args:
+            job: The job to report
+            replayed: Optional. Whether the update is sent again after a reconnect
+        
+        Returns:
+            None
+        """
+        
+        if job is None:
+            return
+        
+        payload = {
+            "type": "job_updated",
+            "job": job.to_dict()
         }
+        if replayed:
+            payload["replayed"] = True
         
-        if message_type in message_handler:
-            await message_handler[message_type](message)
+        if await self._send_json(payload) and job.finished:
+            job.delivered = True
     
     
     async def _handle_connect(self, message: Dict[str, Any]) -> None:
         """
-        Handle initial connection with session ID.
+        Handle a (re)connection. A client that sends the epoch and last sequence
+        number it saw gets only the events it missed; otherwise it is told about
+        pending jobs and, if it had state, sent the full latest resume.
         
         Args:
             websocket: The WebSocket connection
-            message: The message containing session ID
+            message: The message containing session ID, and optionally epoch and last_seq
         """
-        await self.websocket.send_json({
-            "type": "connected",
-            "session_id": self.session_id
-        })
+        last_seq = message.get("last_seq")
+        resumed = self._can_replay(message.get("epoch"), last_seq)
+        
+        # Hold the lock so live events can't interleave with the replay
+        async with self._get_send_lock():
+            await self._write({
+                "type": "connected",
+                "session_id": self.session_id,
+                "epoch": self.epoch,
+                "seq": self._seq,
+                "resumed": resumed
+            })
+            if resumed:
+                for event in [event for event in self._events if event["seq"] > last_seq]:
+                    await self._write(event)
+        
+        session = self.session_manager.get_session(self.session_id)
+        if not session:
+            return
+        
+        pending = job_manager.undelivered_jobs(session)
+        if resumed:
+            # The replay carried every job update since the client's last event
+            for job in pending:
+                if job.finished:
+                    job.delivered = True
+            return
+        
+        # Report jobs that ran or are still running while no client was connected
+        for job in pending:
+            await self.send_job_update(job, replayed=True)
+        
+        # A client that missed more than the buffer holds needs the full resume
+        if last_seq is not None or any(job.finished and job.version is not None for job in pending):
+            await self._handle_resume_resync(message)
+    
+    def _can_replay(self, epoch: Any, last_seq: Any) -> bool:
+        """Whether every event after last_seq is still buffered."""
+        if epoch != self.epoch or not isinstance(last_seq, int) or isinstance(last_seq, bool):
+            return False
+        
+        # The buffer holds the events numbered after self._seq - len(self._events)
+        return self._seq - len(self._events) <= last_seq <= self._seq
+    
+    async def _handle_subscribe_job(self, message: Dict[str, Any]) -> None:
+        """
+        Send the current status of a job, and its resume if it produced one.
+        
+        Args:
+            message: The message containing the job ID
+        """
+        job = self._get_job(message.get("job_id"))
+        if job is None:
+            await self._send_json({
+                "type": "error",
+                "message": "Job not found"
+            })
+            return
+        
+        await self.send_job_update(job, replayed=True)
+        if job.finished and job.version is not None:
+            await self._handle_resume_resync(message)
     
     async def _handle_generate(self, message: Dict[str, Any]) -> None:
         """
@@ -57,7 +301,7 @@ class WebSocketHandler:
             websocket: The WebSocket connection
             message: The message containing session ID
         """
-        await self.websocket.send_json({
+        await self._send_json({
             "type": "agent_response_in_progress"
         })
         
@@ -65,10 +309,7 @@ class WebSocketHandler:
             # Get session data
             session = self.session_manager.get_session(self.session_id)
             if not session:
-                await self.websocket.send_json({
-                    "type": "error",
-                    "message": "Something went wrong. Please refresh."
-                })
+                await self._send_command_error(message, "Something went wrong. Please refresh.")
                 return
         
             # Get resume data and job description from session
@@ -76,22 +317,16 @@ class WebSocketHandler:
             job_description = session.job_description
             
             if not user_profile or not job_description:
-                await self.websocket.send_json({
-                    "type": "error",
-                    "message": "Missing user profile or job description. Please upload again."
-                })
+                await self._send_command_error(message, "Missing user profile or job description. Please upload again.")
                 return
             
-            await session.resume_team.generate_resume()
+            await run_generation(self.session_manager, self.session_id)
             
         except Exception as e:
-            await self.websocket.send_json({
-                "type": "error",
-                "message": "Something went wrong while generating resume. Please try again"
-            })
+            await self._send_command_error(message, "Something went wrong while generating resume. Please try again")
         
         finally:
-            await self.websocket.send_json({
+            await self._send_json({
                 "type": "agent_response_completed"
             })
             
@@ -104,58 +339,111 @@ class WebSocketHandler:
             websocket: The WebSocket connection
             message: The message containing feedback
         """
-        await self.websocket.send_json({
+        await self._send_json({
             "type": "agent_response_in_progress"
         })
         
         user_text = message.get("message", "").strip()
         if not user_text:
-            await self.websocket.send_json({
-                "type": "error",
-                "message": "No message found. Please enter some message"
-            })
+            await self._send_command_error(message, "No message found. Please enter some message")
             return
         
         try:
             # Get session data
             session = self.session_manager.get_session(self.session_id)
             if not session:
-                await self.websocket.send_json({
-                    "type": "error",
-                    "message": "Something went wrong. Please refresh."
-                })
+                await self._send_command_error(message, "Something went wrong. Please refresh.")
                 return
             
             # Process user message
-            await session.resume_team.process_user_message(user_text)
+            resume_team = self.session_manager.get_resume_team(self.session_id)
+            await resume_team.process_user_message(user_text)
             
         except Exception as e:
-            await self.websocket.send_json({
-                "type": "error",
-                "message": "Something went wrong while processing your request. Please try again"
-            })
+            await self._send_command_error(message, "Something went wrong while processing your request. Please try again")
         
         finally:
-            await self.websocket.send_json({
+            await self._send_json({
                 "type": "agent_response_completed"
             })
     
-    async def trigger_resume_updated_event(self, resume_markdown: str) -> None:
+    async def _handle_resume_ack(self, message: Dict[str, Any]) -> None:
+        """
+        Record the resume version the client has rendered.
+        
+        Args:
+            message: The message containing the acknowledged version
+        """
+        version = message.get("version")
+        if isinstance(version, int) and not isinstance(version, bool):
+            self.acked_resume_version = version
+    
+    async def _handle_resume_resync(self, message: Dict[str, Any]) -> None:
+        """
+        Resend the full latest resume when the client could not apply a patch.
+        
+        Args:
+            message: The resync request
+        """
+        self.acked_resume_version = None
+        
+        version = self.session_manager.get_latest_resume_version(self.session_id)
+        if version is None:
+            return
+        
+        resume_markdown = self.session_manager.get_resume_markdown(self.session_id, version=version)
+        if resume_markdown:
+            await self.trigger_resume_updated_event(resume_markdown=resume_markdown, version=version)
+    
+    def _build_resume_patch(self, resume_markdown: str, version: Optional[int]) -> Optional[Delta]:
+        """
+        Diff the resume against the client's acknowledged version.
+        
+        Returns:
+            Delta: Patch ops, or None when a full update should be sent instead
+        """
+        if version is None or self.acked_resume_version is None or len(resume_markdown) > RESUME_PATCH_MAX_CHARS:
+            return None
+        
+        base = self.session_manager.get_resume_markdown(self.session_id, version=self.acked_resume_version)
+        if not base:
+            # The acknowledged version was evicted from the session
+            return None
+        
+        if abs(len(resume_markdown) - len(base)) > len(resume_markdown) * RESUME_PATCH_MAX_LENGTH_CHANGE:
+            # A rewrite rather than an edit; a patch would not be much smaller
+            return None
+        
+        # Gives up as soon as the patch would be no smaller than the resume
+        return diff_text(base, resume_markdown, max_size=len(resume_markdown))
+    
+    async def trigger_resume_updated_event(self, resume_markdown: str, version: Optional[int] = None) -> None:
         """
         Trigger the resume updated event to the client.
+        Sends a resume_patch against the acknowledged version when it is
+        smaller, otherwise the full resume.
         Args:
             resume_markdown: Resume data to be updated
+            version: Optional. Version number of the resume
 
         Returns:
             None
         """
         
-        if not self.websocket:
+        ops = self._build_resume_patch(resume_markdown, version)
+        if ops is not None:
+            await self._send_json({
+                "type": "resume_patch",
+                "base_version": self.acked_resume_version,
+                "version": version,
+                "ops": ops
+            })
             return
         
-        await self.websocket.send_json ({
+        await self._send_json({
             "type": "resume_updated",
-            "data": resume_markdown
+            "data": resume_markdown,
+            "version": version
         })
     
     async def send_agent_response(self, message: str) -> None:
@@ -169,10 +457,91 @@ class WebSocketHandler:
             None
         """
         
+        await self._send_json({
+            "type": "agent_response",
+            "message": message
+        })
+    
+    async def send_stream_delta(self, stream: str, delta: str) -> None:
+        """
+        Sends partial agent output while a run is in progress
+        
+        Args:
+            stream: "chat" for message text or "resume" for resume HTML
+            delta: Text produced since the previous delta
+
+        Returns:
+            None
+        """
+        
         if not self.websocket:
             return
         
-        await self.websocket.send_json({
-            "type": "agent_response",
-            "message": message
+        if stream == "resume":
+            await self._send_json({
+                "type": "resume_delta",
+                "data": delta
+            })
+        else:
+            await self._send_json({
+                "type": "agent_response_delta",
+                "message": delta
+            })
+    
+    async def send_queue_position(self, position: int) -> None:
+        """
+        Tells the client where its request stands in the model queue
+        
+        Args:
+            position: Place in the queue, 0 once the request is being processed
+
+        Returns:
+            None
+        """
+        
+        await self._send_json({
+            "type": "queue_position",
+            "position": position
+        })
+    
+    async def send_batch_item_completed(self, batch_id: str, item: Dict[str, Any], resume_markdown: Optional[str] = None) -> None:
+        """
+        Sends the outcome of one batch item as soon as it finishes
+        
+        Args:
+            batch_id: Batch the item belongs to
+            item: Item status, version and timing
+            resume_markdown: Optional. The generated resume, if the item succeeded
+
+        Returns:
+            None
+        """
+        
+        await self._send_json({
+            "type": "batch_item_completed",
+            "batch_id": batch_id,
+            "item": item,
+            "data": resume_markdown
+        })
+    
+    async def send_batch_completed(self, batch_id: str, completed: int, failed: int, duration_ms: float) -> None:
+        """
+        Tells the client that every item of a batch has finished
+        
+        Args:
+            batch_id: The finished batch
+            completed: Number of items that produced a resume
+            failed: Number of items that failed
+            duration_ms: Wall time of the whole batch
+
+        Returns:
+            None
+        """
+        
+        await self._send_json({
+            "type": "batch_completed",
+            "batch_id": batch_id,
+            "completed": completed,
+            "failed": failed,
+            "duration_ms": duration_ms
         })
\ No newline at end of file
@@ -0,0 +1,232 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from uuid import uuid4
+import asyncio
+import os
+import time
+from ..agents.generation import run_generation
+from .session_manager import SESSION_TIMEOUT, session_manager
+from .job_manager import job_manager
+from ..helpers.command_scheduler import AGENT_RUN_TIMEOUT
+from ..helpers.logger import get_logger
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 25))  # job descriptions per batch
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 2))  # generations of one batch running at once
+BATCHES_PER_SESSION = int(os.getenv('BATCHES_PER_SESSION', 5))  # finished batches kept per session
+
+# How often a running batch marks its session as in use, well within the session timeout
+BATCH_KEEPALIVE_INTERVAL = max(1.0, SESSION_TIMEOUT / 4)
+
+class BatchItem:
+    """One job description of a batch and the outcome of its generation."""
+
+    def __init__(self, index: int, job_description: str):
+        self.index = index
+        self.job_description = job_description
+        self.status = "queued"
+        # Numbered within the batch in the order results finish
+        self.version: Optional[int] = None
+        # Kept on the item because its child session is deleted once the item finishes
+        self.resume_markdown: Optional[str] = None
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "status": self.status,
+            "version": self.version,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "job_description_preview": self.job_description[:120]
+        }
+
+class Batch:
+    """Job descriptions generated against one session's profile, in the background."""
+
+    def __init__(self, session_id: str, job_descriptions: List[str]):
+        self.batch_id = str(uuid4())
+        self.session_id = session_id
+        self.created_at = datetime.utcnow()
+        self.items = [BatchItem(index, job_description) for index, job_description in enumerate(job_descriptions)]
+        self.duration_ms: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.latest_version = 0
+
+    def add_result(self, item: 'BatchItem', resume_markdown: str) -> None:
+        """Keep an item's resume as the batch's next version."""
+        self.latest_version += 1
+        item.version = self.latest_version
+        item.resume_markdown = resume_markdown
+
+    @property
+    def done(self) -> bool:
+        return self.task is not None and self.task.done()
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts = {status: sum(1 for item in self.items if item.status == status) for status in ("queued", "running", "completed", "failed")}
+        return {
+            "batch_id": self.batch_id,
+            "created_at": self.created_at.isoformat(),
+            "done": self.done,
+            "duration_ms": self.duration_ms,
+            "latest_version": self.latest_version,
+            **counts,
+            "items": [item.to_dict() for item in self.items]
+        }
+
+class BatchManager:
+    """
+    Generates resumes for one uploaded profile against many job descriptions.
+
+    Each item runs in a short-lived child session that shares the parent's
+    parsed profile, so items keep separate agent history. The resume is kept
+    on the item as the batch's next version, and the child session deleted
+    as soon as the item finishes.
+    Items run concurrently up to a per-batch limit and hold a JobManager
+    worker while generating, so batches share the GENERATION_WORKERS cap
+    with every other agent run. Batches live as long as their parent
+    session, which a running batch keeps in use: releasing the session
+    cancels its running batch and forgets the rest.
+    Each finished resume is pushed to the parent session's socket as soon as
+    it is ready.
+    """
+
+    def __init__(self, session_manager: Any, concurrency: int = BATCH_CONCURRENCY, max_items: int = BATCH_MAX_ITEMS, batches_per_session: int = BATCHES_PER_SESSION):
+        self._session_manager = session_manager
+        self._concurrency = max(1, concurrency)
+        self.max_items = max(1, max_items)
+        self._batches_per_session = max(1, batches_per_session)
+        self._batches: Dict[str, Batch] = {}
+        session_manager.add_drop_listener(self._forget_session)
+
+    def start_batch(self, session_id: str, job_descriptions: List[str]) -> Batch:
+        """
+        Start generating a resume for each job description in the background.
+
+        Args:
+            session_id: Parent session holding the uploaded profile
+            job_descriptions: Validated job descriptions, one per item
+
+        Returns:
+            Batch: The started batch
+        """
+        self._prune(session_id)
+        batch = Batch(session_id=session_id, job_descriptions=job_descriptions)
+        self._batches[batch.batch_id] = batch
+        batch.task = asyncio.create_task(self._run_batch(batch))
+        return batch
+
+    def get_batch(self, session_id: str, batch_id: str) -> Optional[Batch]:
+        """Get a batch of the session, or None if it does not exist or belongs to another session."""
+        batch = self._batches.get(batch_id)
+        if batch is None or batch.session_id != session_id:
+            return None
+        return batch
+
+    def has_running_batch(self, session_id: str) -> bool:
+        return any(batch.session_id == session_id and not batch.done for batch in self._batches.values())
+
+    def get_item_resume(self, batch: Batch, index: int) -> Optional[str]:
+        """Get the resume generated for a batch item, or None if it has none (yet)."""
+        if index < 0 or index >= len(batch.items):
+            return None
+        return batch.items[index].resume_markdown
+
+    def _prune(self, session_id: str) -> None:
+        """Drop the session's oldest finished batches beyond the limit."""
+        finished = [batch for batch in self._batches.values() if batch.session_id == session_id and batch.done]
+        for batch in finished[:max(0, len(finished) - self._batches_per_session + 1)]:
+            del self._batches[batch.batch_id]
+
+    def _forget_session(self, session_id: str) -> None:
+        """Cancel and drop the batches of a session that was deleted or expired."""
+        for batch_id, batch in list(self._batches.items()):
+            if batch.session_id == session_id:
+                if batch.task is not None and not batch.task.done():
+                    logger.info(f"Cancelling batch {batch_id} of released session_id {session_id}")
+                    batch.task.cancel()
+                del self._batches[batch_id]
+
+    async def _run_batch(self, batch: Batch) -> None:
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def run_item(item: BatchItem) -> None:
+            async with semaphore:
+                await self._run_item(batch, item)
+
+        items = asyncio.ensure_future(asyncio.gather(*(run_item(item) for item in batch.items)))
+        try:
+            while not items.done():
+                # Keep the parent session from expiring, and cancelling this batch, while items run
+                self._session_manager.touch_session(batch.session_id)
+                await asyncio.wait({items}, timeout=BATCH_KEEPALIVE_INTERVAL)
+            await items
+        except asyncio.CancelledError:
+            items.cancel()
+            # Let the items unwind, deleting their child sessions, before the batch ends
+            await asyncio.gather(items, return_exceptions=True)
+            raise
+        batch.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        socket_handler = self._session_manager.get_websocket_handler(session_id=batch.session_id)
+        if socket_handler:
+            summary = batch.to_dict()
+            await socket_handler.send_batch_completed(batch_id=batch.batch_id, completed=summary["completed"], failed=summary["failed"], duration_ms=batch.duration_ms)
+
+    async def _run_item(self, batch: Batch, item: BatchItem) -> None:
+        async with job_manager.worker():
+            await self._generate_item(batch, item)
+
+        socket_handler = self._session_manager.get_websocket_handler(session_id=batch.session_id)
+        if socket_handler:
+            await socket_handler.send_batch_item_completed(batch_id=batch.batch_id, item=item.to_dict(), resume_markdown=item.resume_markdown)
+
+    async def _generate_item(self, batch: Batch, item: BatchItem) -> None:
+        item.status = "running"
+        started = time.perf_counter()
+        child_id: Optional[str] = None
+        try:
+            child_id = self._create_child_session(batch.session_id, item.job_description)
+            await asyncio.wait_for(run_generation(self._session_manager, child_id), timeout=AGENT_RUN_TIMEOUT if AGENT_RUN_TIMEOUT > 0 else None)
+
+            resume_markdown = self._session_manager.get_resume_markdown(session_id=child_id)
+            if not resume_markdown:
+                raise RuntimeError("No resume was generated")
+            batch.add_result(item, resume_markdown)
+            item.status = "completed"
+        except asyncio.CancelledError:
+            item.status = "failed"
+            item.error = "Batch was cancelled"
+            raise
+        except asyncio.TimeoutError:
+            item.status = "failed"
+            item.error = "Generation took too long"
+        except Exception as e:
+            logger.error(f"Batch {batch.batch_id} item {item.index} failed: {str(e)}")
+            item.status = "failed"
+            item.error = "Generation failed"
+        finally:
+            item.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            if child_id is not None:
+                self._session_manager.delete_session(child_id)
+
+    def _create_child_session(self, session_id: str, job_description: str) -> str:
+        """Create a session for one item, reusing the parent's parsed profile."""
+        parent = self._session_manager.get_session(session_id)
+        if not parent or not parent.user_profile:
+            raise RuntimeError("The batch's session has no user profile")
+
+        child_id = self._session_manager.create_session()
+        profile = parent.user_profile.model_dump()
+        profile["parsed_at"] = profile["parsed_at"].isoformat()
+        if not self._session_manager.update_user_profile(child_id, profile) or not self._session_manager.update_job_description(child_id, job_description):
+            self._session_manager.delete_session(child_id)
+            raise RuntimeError("Failed to set up the batch item session")
+        return child_id
+
+# Create a global instance backed by the global session manager
+batch_manager = BatchManager(session_manager=session_manager)
@@ -0,0 +1,161 @@
+from typing import Optional, Union
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from ..helpers.parser import DocumentParser, PARSER_MAX_PAGES
+from ..helpers.logger import get_logger
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+INGESTION_WORKERS = int(os.getenv('INGESTION_WORKERS', min(4, os.cpu_count() or 1)))
+INGESTION_PARSE_TIMEOUT = float(os.getenv('INGESTION_PARSE_TIMEOUT', 30))  # seconds per parse task, once it has a worker
+INGESTION_MAX_QUEUE = int(os.getenv('INGESTION_MAX_QUEUE', 16))  # parses in flight or waiting
+INGESTION_PDF_PAGES_PER_TASK = int(os.getenv('INGESTION_PDF_PAGES_PER_TASK', 8))  # minimum PDF pages per worker task
+
+class IngestionQueueFullError(Exception):
+    """Raised when too many parses are already waiting for a worker."""
+
+class IngestionTimeoutError(Exception):
+    """Raised when a parse does not finish within the configured timeout."""
+
+class IngestionManager:
+    """
+    Runs document parsing in a bounded process pool so the event loop never
+    blocks on PyPDF2 / python-docx work.
+    """
+
+    def __init__(self, workers: int = INGESTION_WORKERS, parse_timeout: float = INGESTION_PARSE_TIMEOUT, max_queue: int = INGESTION_MAX_QUEUE, pdf_pages_per_task: int = INGESTION_PDF_PAGES_PER_TASK, max_pages: int = PARSER_MAX_PAGES):
+        self._workers = max(1, workers)
+        self._parse_timeout = parse_timeout
+        self._max_queue = max(1, max_queue)
+        self._pdf_pages_per_task = max(1, pdf_pages_per_task)
+        self._max_pages = max_pages
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # One slot per worker, so a task only reaches the pool when a worker is free;
+        # created on first use so it binds to the running event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of parses currently running or waiting for a worker."""
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use."""
+        if self._executor is None:
+            # Spawn keeps workers free of the parent's event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _retire_executor(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Stop routing work to a pool after one of its workers hung or died.
+
+        Other parses already running in the old pool are left to finish; its
+        processes are terminated one timeout period later, by which time each
+        of those parses has either finished or timed out itself.
+        """
+        if self._executor is not executor:
+            # Already replaced after an earlier failure
+            return
+        self._executor = None
+
+        # Grab the worker handles before shutdown() drops them
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False)
+
+        def terminate():
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        asyncio.get_running_loop().call_later(self._parse_timeout, terminate)
+
+    async def parse(self, file_content: Union[bytes, str], file_type: str) -> Optional[str]:
+        """
+        Parse a document in the worker pool.
+
+        Args:
+            file_content: Raw bytes of the uploaded file, or the path of a file holding them
+            file_type: File extension (pdf, docx, txt)
+
+        Returns:
+            Extracted text content or None if parsing fails
+        
+        Raises:
+            PageLimitExceededError: If a PDF has more pages than the parser accepts
+        """
+        if self._pending >= self._max_queue:
+            raise IngestionQueueFullError(f"Ingestion queue is full ({self._max_queue} pending)")
+
+        self._pending += 1
+        try:
+            return await self._parse(file_content, file_type)
+
+        except asyncio.TimeoutError:
+            logger.warning(f"Parsing {file_type} file timed out after {self._parse_timeout}s")
+            raise IngestionTimeoutError(f"Parsing did not finish within {self._parse_timeout} seconds")
+
+        except BrokenProcessPool:
+            logger.error("Ingestion worker pool broke, restarting it")
+            return None
+
+        finally:
+            self._pending -= 1
+
+    async def _run(self, func, *args):
+        """
+        Run a parser function in the worker pool once a worker is free.
+        Only the run itself counts toward the timeout, not the wait for a worker.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._workers)
+
+        async with self._slots:
+            executor = self._get_executor()
+            try:
+                return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(executor, func, *args), timeout=self._parse_timeout)
+            except (asyncio.TimeoutError, BrokenProcessPool):
+                self._retire_executor(executor)
+                raise
+
+    async def _parse(self, file_content: Union[bytes, str], file_type: str) -> Optional[str]:
+        """Parse a document, splitting long PDFs into page ranges extracted by several workers."""
+        if file_type != 'pdf' or self._workers == 1:
+            return await self._run(DocumentParser.parse_file, file_content, file_type, self._max_pages)
+
+        page_count = await self._run(DocumentParser.count_pdf_pages, file_content)
+        if page_count is None:
+            return None
+        DocumentParser.check_page_limit(page_count, self._max_pages)
+
+        if page_count <= self._pdf_pages_per_task:
+            return await self._run(DocumentParser.parse_file, file_content, file_type, self._max_pages)
+
+        pages_per_task = max(self._pdf_pages_per_task, math.ceil(page_count / self._workers))
+        page_ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        chunks = await asyncio.gather(*[
+            self._run(DocumentParser.extract_pdf_pages, file_content, start, stop)
+            for start, stop in page_ranges
+        ])
+
+        if any(chunk is None for chunk in chunks):
+            return None
+
+        return "\n".join(page for chunk in chunks for page in chunk).strip()
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Create a global instance with configured limits
+ingestion_manager = IngestionManager()
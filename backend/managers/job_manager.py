@@ -0,0 +1,150 @@
+from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime
+from uuid import uuid4
+import asyncio
+import os
+import time
+from ..helpers.metrics import GENERATION_QUEUE_SECONDS
+from ..helpers.logger import get_logger
+logger = get_logger(__name__)
+
+# Get configuration from environment variables with defaults
+GENERATION_WORKERS = int(os.getenv('GENERATION_WORKERS', 4))  # agent runs executing at once across all sessions
+JOBS_PER_SESSION = int(os.getenv('JOBS_PER_SESSION', 20))  # finished jobs remembered per session
+
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+class Job:
+    """An agent command (generate or user_message) run in the background on behalf of a session."""
+
+    def __init__(self, session_id: str, kind: str):
+        self.job_id = str(uuid4())
+        self.session_id = session_id
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        # Time spent waiting for a worker, which does not count against the run's deadline
+        self.queue_ms: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+        # Resume version the job saved, if any
+        self.version: Optional[int] = None
+        self.error: Optional[str] = None
+        # Whether a client saw the final status; undelivered results are sent on reconnect
+        self.delivered = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "queue_ms": self.queue_ms,
+            "duration_ms": self.duration_ms,
+            "version": self.version,
+            "error": self.error
+        }
+
+class JobManager:
+    """
+    Tracks agent jobs in their session and bounds how many run at once.
+
+    Jobs of one session still run in order through the session's command
+    scheduler; the worker pool caps concurrent runs across all sessions.
+    Jobs outlive the WebSocket, so a client that reconnects can pick up the
+    result instead of starting a new run.
+    """
+
+    def __init__(self, workers: int = GENERATION_WORKERS, jobs_per_session: int = JOBS_PER_SESSION):
+        self._workers = max(1, workers)
+        self._jobs_per_session = max(1, jobs_per_session)
+        # Created on first use so it binds to the running event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running = 0
+
+    def create_job(self, session: Any, session_id: str, kind: str) -> Job:
+        """Create a queued job in the session, forgetting its oldest finished jobs beyond the limit."""
+        job = Job(session_id=session_id, kind=kind)
+        session.jobs[job.job_id] = job
+
+        finished = [job_id for job_id, existing in session.jobs.items() if existing.finished]
+        for job_id in finished[:max(0, len(session.jobs) - self._jobs_per_session)]:
+            del session.jobs[job_id]
+        return job
+
+    def discard_job(self, session: Any, job: Job) -> None:
+        """Remove a job that never ran, e.g. one absorbed by pending work."""
+        session.jobs.pop(job.job_id, None)
+
+    def get_job(self, session: Any, job_id: Optional[str]) -> Optional[Job]:
+        if session is None or not job_id:
+            return None
+        return session.jobs.get(job_id)
+
+    def find_active_job(self, session: Any, kind: str) -> Optional[Job]:
+        """Get the newest queued or running job of a kind."""
+        for job in reversed(list(session.jobs.values())):
+            if job.kind == kind and not job.finished:
+                return job
+        return None
+
+    def undelivered_jobs(self, session: Any) -> list:
+        """Jobs still in progress or finished without a client seeing the result, oldest first."""
+        return [job for job in session.jobs.values() if not job.delivered]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"running": self._running, "workers": self._workers}
+
+    @asynccontextmanager
+    async def worker(self):
+        """Hold one of the GENERATION_WORKERS slots shared by every agent run."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._workers)
+
+        with GENERATION_QUEUE_SECONDS.time():
+            await self._slots.acquire()
+        self._running += 1
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    @asynccontextmanager
+    async def run(self, job: Optional[Job]):
+        """
+        Hold a worker for the duration of a job and record its outcome.
+        The job fails if it recorded an error, and is cancelled if the run is.
+        """
+        queued = time.perf_counter()
+        async with self.worker():
+            started = time.perf_counter()
+            if job is not None:
+                job.queue_ms = round((started - queued) * 1000, 3)
+                job.status = "running"
+                job.started_at = datetime.utcnow()
+            try:
+                yield job
+                if job is not None:
+                    job.status = "failed" if job.error else "completed"
+            except asyncio.CancelledError:
+                if job is not None:
+                    job.status = "cancelled"
+                raise
+            except Exception as e:
+                if job is not None:
+                    job.status = "failed"
+                    job.error = job.error or str(e)
+                raise
+            finally:
+                if job is not None:
+                    job.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+
+# Create a global instance of the job manager
+job_manager = JobManager()
@@ -1,13 +1,22 @@
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Set
+from collections import defaultdict
 import uuid
 from datetime import datetime, timedelta
 import asyncio
+import heapq
 import os
+import random
+import time
 from fastapi import WebSocket
 from ..models.schemas import SessionData
 from ..agents.agent_team import ResumeTeam
+from ..agents.model.llm_scheduler import llm_scheduler
+from ..agents.model.context_budget import context_budget
 from ..helpers.websocket_handler import WebSocketHandler
-from ..db.in_memory_db import db
+from ..helpers.expiry_index import ExpiryIndex
+from ..helpers.memory_accounting import estimate_session_memory
+from ..helpers.tracing import tracer
+from ..db.database import db
 from ..toolbox.session_tools import SessionTools
 from ..helpers.logger import get_logger
 logger = get_logger(__name__)
@@ -15,109 +24,292 @@ logger = get_logger(__name__)
 # Get configuration from environment variables with defaults
 SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', 1800))  # 30 minutes default
 SESSION_CLEANUP_INTERVAL = int(os.getenv('SESSION_CLEANUP_INTERVAL', 300))  # 5 minutes default
+SESSION_CLEANUP_BATCH_SIZE = int(os.getenv('SESSION_CLEANUP_BATCH_SIZE', 500))  # sessions deleted before yielding
+MEMORY_STATS_TTL = float(os.getenv('MEMORY_STATS_TTL', 30))  # seconds a memory estimate is reused
+MEMORY_STATS_SAMPLE = int(os.getenv('MEMORY_STATS_SAMPLE', 200))  # sessions walked per estimate; totals are extrapolated
+MEMORY_STATS_TOP = 100  # heaviest sampled sessions kept with an estimate
 
 class SessionManager:
     def __init__(self, session_timeout: int = SESSION_TIMEOUT):
         self._sessions: Dict[str, SessionData] = {}
         self._session_timeout = session_timeout
-        # Start cleanup task
-        asyncio.create_task(self._periodic_cleanup())
+        self._materialized_teams = 0
+        self._expiry_index = ExpiryIndex()
+        llm_scheduler.add_listener(self._on_queue_position)
+        self._drop_listeners: List[Callable[[str], None]] = []
+        # Queue position sends in flight; the loop only keeps weak references to tasks
+        self._position_sends: Set[asyncio.Task] = set()
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._memory_stats: Optional[Dict[str, Any]] = None
+        self._memory_stats_at = 0.0
+        # Created on first use so it binds to the running event loop
+        self._memory_stats_lock: Optional[asyncio.Lock] = None
+        # Start cleanup task now if a loop is running, otherwise on app startup
+        try:
+            self.start_cleanup_task()
+        except RuntimeError:
+            pass
+    
+    def start_cleanup_task(self) -> None:
+        """Start the periodic cleanup of expired sessions; later calls are no-ops."""
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.get_running_loop().create_task(self._periodic_cleanup())
+    
+    def add_drop_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback receiving the session_id when a session's in-process state is released."""
+        self._drop_listeners.append(listener)
     
     def create_session(self) -> str:
         """Create a new session and return its ID."""
         session_id = str(uuid.uuid4())
-        self._sessions[session_id] = SessionData(
-            created_at=datetime.utcnow(),
-            last_updated=datetime.utcnow(),
-            user_profile=None,
-            job_description=None,
-            resume_store={},
-            resume_team=ResumeTeam(session_id=session_id, session_tools=SessionTools(session_id=session_id, session_manager=self)),
+        db_session = db.create_session_record(session_id)
+        self._sessions[session_id] = self._build_session(session_id=session_id, created_at=db_session.created_at, last_updated=db_session.last_updated)
+        
+        return session_id
+    
+    def _build_session(self, session_id: str, created_at: datetime, last_updated: datetime) -> SessionData:
+        """Build the per-process agents and handlers of a session."""
+        idle_seconds = (datetime.utcnow() - last_updated).total_seconds()
+        self._expiry_index.touch(session_id, time.monotonic() - idle_seconds + self._session_timeout)
+        return SessionData(
+            created_at=created_at,
+            last_updated=last_updated,
+            resume_team=None,
             websocket_handler=WebSocketHandler(session_id=session_id, session_manager=self)
         )
+    
+    def get_resume_team(self, session_id: str) -> Optional[ResumeTeam]:
+        """
+        Get the agent team of a session, building it on first use so sessions
+        that never generate a resume don't pay for it.
+        """
+        session = self._load_session(session_id)
+        if not session:
+            return None
         
-        db.create_session_record(session_id)
+        if session.resume_team is None:
+            session.resume_team = ResumeTeam(session_id=session_id, session_tools=SessionTools(session_id=session_id, session_manager=self))
+            self._materialized_teams += 1
         
-        return session_id
+        return session.resume_team
     
-    def get_session(self, session_id: str) -> Optional[SessionData]:
-        """Get session data by ID."""
+    def _on_queue_position(self, session_id: str, position: int) -> None:
+        """Push a session's place in the LLM queue to its client."""
         session = self._sessions.get(session_id)
+        if not session or session.websocket_handler is None or session.websocket_handler.websocket is None:
+            # No client connected; positions are not replayed, so there is nothing to send
+            return
+        
+        task = asyncio.create_task(session.websocket_handler.send_queue_position(position=position))
+        self._position_sends.add(task)
+        task.add_done_callback(self._on_position_sent)
+    
+    def _on_position_sent(self, task: asyncio.Task) -> None:
+        self._position_sends.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to send queue position: {str(task.exception())}")
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get the number of live sessions and how many of them have built their agent team."""
+        return {
+            "sessions": len(self._sessions),
+            "materialized_teams": self._materialized_teams
+        }
+    
+    async def get_memory_stats(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Estimate the memory held by live sessions, in total and by component.
+        The estimate is reused for MEMORY_STATS_TTL seconds, and concurrent
+        callers wait for the same walk.
         
-        if session:
-            db_session = db.get_session_record(session_id)
-            session.job_description = db_session.job_description
-            session.user_profile = db_session.user_profile
-            session.resume_store = db_session.resume_store
+        Args:
+            top: Number of heaviest sessions to list, up to MEMORY_STATS_TOP
+        
+        Returns:
+            Dict: Session counts, bytes per component, resume store bytes and
+            the heaviest sampled sessions, identified by a session id prefix only
+        """
+        if self._memory_stats_lock is None:
+            self._memory_stats_lock = asyncio.Lock()
+        
+        async with self._memory_stats_lock:
+            if self._memory_stats is None or time.monotonic() - self._memory_stats_at > MEMORY_STATS_TTL:
+                self._memory_stats = await self._estimate_memory()
+                self._memory_stats_at = time.monotonic()
+        
+        stats = self._memory_stats
+        return {**stats, "top_sessions": stats["top_sessions"][:max(0, top)]}
+    
+    async def _estimate_memory(self) -> Dict[str, Any]:
+        """Walk a sample of at most MEMORY_STATS_SAMPLE sessions, yielding to the event loop between them."""
+        sessions = list(self._sessions.items())
+        connected = sum(1 for _, session in sessions if session.websocket_handler and session.websocket_handler.websocket)
+        sample = random.sample(sessions, MEMORY_STATS_SAMPLE) if 0 < MEMORY_STATS_SAMPLE < len(sessions) else sessions
         
+        totals: Dict[str, int] = defaultdict(int)
+        per_session = []
+        for session_id, session in sample:
+            # Records of on-demand stores count only once this process has loaded them
+            record = session.record or db.get_resident_record(session_id)
+            usage = estimate_session_memory(session, record=record, exclude=(self,))
+            for component, size in usage.items():
+                totals[component] += size
+            per_session.append((usage["total"], session_id, usage))
+            await asyncio.sleep(0)
+        
+        # Scale the sample up to every live session
+        scale = len(sessions) / len(sample) if sample else 0
+        totals = {component: int(size * scale) for component, size in totals.items()}
+        heaviest = heapq.nlargest(MEMORY_STATS_TOP, per_session, key=lambda entry: entry[0])
+        return {
+            **self.get_stats(),
+            "sampled_sessions": len(sample),
+            "connected_websockets": connected,
+            "resume_store_bytes": totals.get("resume_store", 0),
+            "memory_bytes": totals,
+            "average_session_bytes": totals.get("total", 0) // len(sessions) if sessions else 0,
+            "top_sessions": [{"session": session_id[:8], **usage} for _, session_id, usage in heaviest]
+        }
+    
+    def _load_session(self, session_id: str) -> Optional[SessionData]:
+        """
+        Get the in-process session, rebuilding it from the stored record when
+        the session was created by another worker or before a restart.
+        """
+        session = self._sessions.get(session_id)
+        if session is not None or not session_id:
+            return session
+        
+        db_session = db.get_session_record(session_id)
+        if not db_session:
+            return None
+        
+        session = self._build_session(session_id=session_id, created_at=db_session.created_at, last_updated=db_session.last_updated)
+        session.record = db_session
+        self._sessions[session_id] = session
         return session
     
+    def get_session(self, session_id: str) -> Optional[SessionData]:
+        """
+        Get session data by ID.
+        
+        The returned session reads its profile, job description and resumes
+        from the stored record without copying them. The record is only
+        re-fetched when the store's version counter moved, so callers can
+        compare `session.version` to tell whether anything changed.
+        """
+        session = self._load_session(session_id)
+        if not session:
+            return None
+        
+        version = db.get_record_version(session_id)
+        if version is None:
+            # Deleted by another worker or the stored-session cleanup
+            self._drop_local_state(session_id)
+            return None
+        
+        if session.record is None or session.record.version != version:
+            session.record = db.get_session_record(session_id)
+        
+        return session
+    
+    def get_session_version(self, session_id: str) -> Optional[int]:
+        """Get the change counter of a session's stored data, or None if it does not exist."""
+        if not self._load_session(session_id):
+            return None
+        
+        return db.get_record_version(session_id)
+    
     def update_websocket(self, session_id: str, websocket: WebSocket) -> bool:
         """Update websocket for a session."""
-        if session_id not in self._sessions:
+        session = self._load_session(session_id)
+        if not session:
             return False
         
-        session = self._sessions[session_id]
-        
         if not session.websocket_handler:
             return False
         
         session.websocket_handler.set_websocket(websocket)
-        session.last_updated = datetime.utcnow()
+        self._touch(session_id, session)
         
         return True
     
     def get_websocket_handler(self, session_id: str) -> Optional[WebSocketHandler]:
         """Update websocket for a session."""
         
-        if session_id not in self._sessions:
+        session = self._load_session(session_id)
+        if not session:
             return None
         
-        return self._sessions[session_id].websocket_handler
+        return session.websocket_handler
     
     def update_user_profile(self, session_id: str, user_profile: Dict[str, Any]) -> bool:
         """Update resume data for a session."""
-        if session_id not in self._sessions:
+        if not self._load_session(session_id):
             return False
         
         updated = db.update_user_profile(session_id=session_id, user_profile=user_profile)
         if not updated:
             return False
         
-        self._sessions[session_id].last_updated = datetime.utcnow()
+        self._touch(session_id, self._sessions[session_id], stored=True)
         return True
     
     def update_job_description(self, session_id: str, job_description: str) -> bool:
         """Update job description for a session."""
-        if session_id not in self._sessions:
+        if not self._load_session(session_id):
             return False
         
         updated = db.update_job_description(session_id=session_id, job_description=job_description)
         if not updated:
             return False
         
-        self._sessions[session_id].last_updated = datetime.utcnow()
+        self._touch(session_id, self._sessions[session_id], stored=True)
         return True
     
     def update_resume_markdown(self, session_id: str, resume_markdown: str, version: Optional[int]=None) -> bool:
         """Update resume markdown for a session."""
-        if session_id not in self._sessions:
+        if not self._load_session(session_id):
             return False
         
         updated = db.update_resume_markdown(session_id=session_id, resume_markdown=resume_markdown, version=version)
         if not updated:
             return False
 
-        self._sessions[session_id].last_updated = datetime.utcnow()
+        self._touch(session_id, self._sessions[session_id], stored=True)
         return True
     
     def get_resume_markdown(self, session_id: str, version: Optional[int]=None) -> Optional[str]:
         """Update resume markdown for a session."""
-        if session_id not in self._sessions:
+        if not self._load_session(session_id):
             return None
         
         return db.get_resume_markdown(session_id=session_id, version=version)
     
+    def get_latest_resume_version(self, session_id: str) -> Optional[int]:
+        """Get the newest resume version number for a session, or None if it has no resume."""
+        
+        session = self.get_session(session_id=session_id)
+        
+        if not session or not session.resume_store.latest_version:
+            return None
+        
+        return session.resume_store.latest_version
+    
+    def get_prompt_metrics(self, session_id: str) -> list:
+        """Get prompt size metrics of a session's recent agent runs."""
+        if not self._load_session(session_id):
+            return []
+        
+        return context_budget.get_runs(session_id)
+    
+    def get_traces(self, session_id: str) -> list:
+        """Get the span trees of a session's recent agent runs."""
+        if not self._load_session(session_id):
+            return []
+        
+        return tracer.get_traces(session_id)
+    
     def get_resume_versions(self, session_id: str) -> list:
         """Get a list of all resume version numbers for a session."""
         
@@ -126,50 +318,130 @@ class SessionManager:
         if not session:
             return []
         
-        return sorted(session.resume_store.keys())
+        return session.resume_store.versions()
     
     def delete_session(self, session_id: str) -> bool:
         """Delete a session."""
-        if session_id not in self._sessions:
+        deleted = db.delete_session_record(session_id=session_id)
+        session = self._drop_local_state(session_id)
+        return deleted or session is not None
+    
+    def _drop_local_state(self, session_id: str) -> Optional[SessionData]:
+        """Release this process's agents, handlers and bookkeeping of a session, leaving its stored record alone."""
+        session = self._sessions.pop(session_id, None)
+        self._expiry_index.remove(session_id)
+        context_budget.forget(session_id)
+        tracer.forget(session_id)
+        if session is not None and session.websocket_handler is not None:
+            # Jobs outlive connections but not their session
+            session.websocket_handler.scheduler.cancel_all()
+        if session is not None and session.resume_team is not None:
+            self._materialized_teams -= 1
+        for listener in self._drop_listeners:
+            try:
+                listener(session_id)
+            except Exception as e:
+                logger.error(f"Session drop listener failed: {str(e)}")
+        return session
+    
+    def touch_session(self, session_id: str) -> bool:
+        """Mark a session as in use without changing its data, e.g. while background work runs for it."""
+        session = self._sessions.get(session_id)
+        if session is None:
             return False
         
-        db.delete_session_record(session_id=session_id)
-        del self._sessions[session_id]
+        self._touch(session_id, session)
         return True
     
     def is_valid_session(self, session_id: str) -> bool:
         """Checks is a session is valid"""
-        session = self.get_session(session_id)
+        session = self._load_session(session_id)
         
         if not session:
             return False
         
-        return not self._is_session_expired(session)
+        return not self._is_session_expired(session_id)
     
-    def _is_session_expired(self, session: SessionData) -> bool:
-        """Check if a session has expired."""
-        now = datetime.utcnow()
-        return (now - session.last_updated) > timedelta(seconds=self._session_timeout)
+    def _touch(self, session_id: str, session: SessionData, stored: bool = False) -> None:
+        """
+        Mark a session as active and push back its expiry deadline.
+        
+        Args:
+            stored: Whether the store already recorded the use, as every data update does
+        """
+        session.last_updated = datetime.utcnow()
+        self._expiry_index.touch(session_id, time.monotonic() + self._session_timeout)
+        if not stored:
+            # Other workers and the stored-session cleanup go by the stored time
+            db.touch_session_record(session_id)
     
-    def cleanup_expired_sessions(self) -> int:
-        """Clean up expired sessions and return the number of sessions cleaned up."""
-        expired_sessions = [
-            session_id for session_id, session in self._sessions.items()
-            if self._is_session_expired(session)
-        ]
+    def _is_session_expired(self, session_id: str) -> bool:
+        """
+        Check if a session has expired. Once the local deadline passes, the
+        stored last use decides, since another worker may have used the session.
+        """
+        deadline = self._expiry_index.deadline(session_id)
+        if deadline is not None and deadline >= time.monotonic():
+            return False
+        
+        last_updated = db.get_last_updated(session_id)
+        if last_updated is None:
+            return True
+        
+        idle_seconds = (datetime.utcnow() - last_updated).total_seconds()
+        if idle_seconds >= self._session_timeout:
+            return True
+        
+        self._expiry_index.touch(session_id, time.monotonic() - idle_seconds + self._session_timeout)
+        return False
+    
+    def cleanup_expired_sessions(self, limit: Optional[int] = None) -> int:
+        """
+        Clean up sessions idle in this process and return how many were cleaned up.
+        Only expired sessions are visited, oldest first.
+        
+        A session another worker used within the timeout keeps its stored
+        record and gets its deadline re-armed from the stored last use. Otherwise
+        its in-process state is released and its record deleted, unless a worker
+        used it in the meantime.
         
+        Args:
+            limit: Optional. Maximum number of sessions to clean up in this call
+        """
+        expired_sessions = self._expiry_index.pop_expired(now=time.monotonic(), limit=limit)
+        
+        cleaned = 0
         for session_id in expired_sessions:
-            self.delete_session(session_id=session_id)
+            if not self._is_session_expired(session_id):
+                continue
+            
+            self._drop_local_state(session_id)
+            cutoff = datetime.utcnow() - timedelta(seconds=self._session_timeout)
+            db.delete_session_record_if_idle(session_id=session_id, cutoff=cutoff)
+            cleaned += 1
         
-        return len(expired_sessions)
+        return cleaned
     
     async def _periodic_cleanup(self):
-        """Periodically clean up expired sessions."""
+        """Periodically clean up expired sessions in small batches, yielding to the event loop between them."""
         while True:
             try:
-                cleaned = self.cleanup_expired_sessions()
+                cleaned = 0
+                while True:
+                    batch = self.cleanup_expired_sessions(limit=SESSION_CLEANUP_BATCH_SIZE)
+                    cleaned += batch
+                    if batch < SESSION_CLEANUP_BATCH_SIZE:
+                        break
+                    await asyncio.sleep(0)
+                
+                # Drop stored sessions that no live process has loaded
+                cutoff = datetime.utcnow() - timedelta(seconds=self._session_timeout)
+                cleaned += db.delete_records_before(cutoff)
+                
                 if cleaned > 0:
                     logger.info(f"Cleaned up {cleaned} expired sessions")
+                stats = self.get_stats()
+                logger.debug(f"Live sessions: {stats['sessions']}, materialized teams: {stats['materialized_teams']}")
             except Exception as e:
                 logger.error(f"Error during session cleanup: {e}")
             
@@ -177,4 +449,4 @@ class SessionManager:
             await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
 
 # Create a global instance with configured timeout
-session_manager = SessionManager() 
\ No newline at end of file
+session_manager = SessionManager()
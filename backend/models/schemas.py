@@ -1,10 +1,14 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, Any, Dict, List
 from datetime import datetime
+from ..db.resume_version_store import ResumeVersionStore
 
 class JobDescription(BaseModel):
     description: str
 
+class BatchRequest(BaseModel):
+    job_descriptions: List[str]
+
 class UserProfileFile(BaseModel):
     filename: str
     content_type: str
@@ -12,23 +16,42 @@ class UserProfileFile(BaseModel):
     content: str
     parsed_at: datetime
 
-class SessionData(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-    websocket_handler: Any = None
-    resume_team: Any = None
-    user_profile: Optional[UserProfileFile] = None
-    job_description: Optional[str] = None
-    resume_store: Optional[dict] = None
-    created_at: datetime
-    last_updated: datetime
-
 class DBSession(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
     session_id: str
     created_at: datetime
     last_updated: datetime
     user_profile: Optional[UserProfileFile] = None
     job_description: Optional[str] = None
-    resume_store: dict
+    resume_store: ResumeVersionStore
+    version: int = 0
+
+class SessionData(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    websocket_handler: Any = None
+    resume_team: Any = None
+    record: Optional[DBSession] = None
+    # Agent jobs by id, oldest first; they outlive the session's WebSocket connections
+    jobs: Dict[str, Any] = Field(default_factory=dict)
+    created_at: datetime
+    last_updated: datetime
+    
+    @property
+    def user_profile(self) -> Optional[UserProfileFile]:
+        return self.record.user_profile if self.record else None
+    
+    @property
+    def job_description(self) -> Optional[str]:
+        return self.record.job_description if self.record else None
+    
+    @property
+    def resume_store(self) -> Optional[ResumeVersionStore]:
+        return self.record.resume_store if self.record else None
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped by the store on every change to the session's data."""
+        return self.record.version if self.record else 0
 
 class SessionResponse(BaseModel):
     session_id: str
@@ -0,0 +1,54 @@
+from fastapi import HTTPException
+from ..managers.session_manager import session_manager
+from ..managers.batch_manager import batch_manager
+from ..models.schemas import BatchRequest
+
+MAX_JOB_DESCRIPTION_LENGTH = 10000
+
+def handle_batch_request(batch_request: BatchRequest, session_id: str = None):
+    if not session_id or not session_manager.is_valid_session(session_id):
+        raise HTTPException(
+            status_code=404,
+            detail="Session not found. Please upload your profile first"
+        )
+    
+    session = session_manager.get_session(session_id)
+    if not session or not session.user_profile:
+        raise HTTPException(
+            status_code=400,
+            detail="Missing user profile. Please upload your profile first"
+        )
+    
+    job_descriptions = [job_description.strip() for job_description in batch_request.job_descriptions]
+    if not job_descriptions:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one job description is required"
+        )
+    
+    if len(job_descriptions) > batch_manager.max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many job descriptions. Maximum allowed is {batch_manager.max_items} per batch"
+        )
+    
+    for index, job_description in enumerate(job_descriptions):
+        if not job_description:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Job description {index + 1} cannot be empty"
+            )
+        if len(job_description) > MAX_JOB_DESCRIPTION_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Job description {index + 1} is too long. Maximum allowed is 10,000 characters"
+            )
+    
+    if batch_manager.has_running_batch(session_id):
+        raise HTTPException(
+            status_code=409,
+            detail="A batch is already running for this session"
+        )
+    
+    batch = batch_manager.start_batch(session_id=session_id, job_descriptions=job_descriptions)
+    return batch.to_dict()
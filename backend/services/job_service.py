@@ -0,0 +1,44 @@
+from fastapi import HTTPException
+from ..managers.session_manager import session_manager
+from ..managers.job_manager import job_manager
+
+def handle_generate_request(session_id: str = None):
+    if not session_id or not session_manager.is_valid_session(session_id):
+        raise HTTPException(
+            status_code=404,
+            detail="Session not found. Please upload your profile first"
+        )
+
+    session = session_manager.get_session(session_id)
+    if not session or not session.user_profile or not session.job_description:
+        raise HTTPException(
+            status_code=400,
+            detail="Missing user profile or job description. Please upload again."
+        )
+
+    job = session.websocket_handler.submit_job({"type": "generate"})
+    if job is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to start resume generation"
+        )
+    return job.to_dict()
+
+def handle_job_status(job_id: str, session_id: str = None):
+    if not session_id or not session_manager.is_valid_session(session_id):
+        raise HTTPException(
+            status_code=404,
+            detail="Session not found"
+        )
+
+    job = job_manager.get_job(session_manager.get_session(session_id), job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+
+    response = job.to_dict()
+    if job.status == "completed" and job.version is not None:
+        response["data"] = session_manager.get_resume_markdown(session_id=session_id, version=job.version)
+    return response
@@ -1,12 +1,15 @@
 from fastapi import UploadFile, HTTPException
 from datetime import datetime
-from ..helpers.parser import DocumentParser
 from ..managers.session_manager import session_manager
+from ..managers.ingestion_manager import ingestion_manager, IngestionQueueFullError, IngestionTimeoutError
+from ..helpers.parser import PageLimitExceededError, PARSER_MAX_PAGES
 from ..helpers.response_utils import create_session_response
+from ..helpers.parse_cache import parse_cache, make_parse_cache_key
+from ..helpers.upload_reader import read_upload, UploadTooLargeError
 
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
 
-def handle_file_upload(file: UploadFile, session_id: str = None):
+async def handle_file_upload(file: UploadFile, session_id: str = None):
     allowed_types = [".pdf", ".docx", ".txt"]
     file_ext = file.filename.lower().split(".")[-1]
     if f".{file_ext}" not in allowed_types:
@@ -14,16 +17,41 @@ def handle_file_upload(file: UploadFile, session_id: str = None):
             status_code=400,
             detail=f"File type not allowed. Please upload one of: {', '.join(allowed_types)}"
         )
-    # Read file content
-    file_content = file.file.read()
-    if len(file_content) > MAX_FILE_SIZE:
+    # Read file content in chunks, rejecting it as soon as it crosses the limit
+    try:
+        upload = await read_upload(file, max_size=MAX_FILE_SIZE)
+    except UploadTooLargeError:
         raise HTTPException(
             status_code=400,
             detail=f"File too large. Maximum size is {MAX_FILE_SIZE/1024/1024}MB"
         )
-    # Parse the file
-    parser = DocumentParser()
-    text_content = parser.parse_file(file_content, file_ext)
+    try:
+        # Reuse the text from an earlier upload of the same file
+        cache_key = make_parse_cache_key(upload.digest, file_ext)
+        text_content = parse_cache.get(cache_key)
+        
+        # Parse the file off the event loop
+        if text_content is None:
+            text_content = await ingestion_manager.parse(upload.source, file_ext)
+            if text_content:
+                parse_cache.put(cache_key, text_content)
+    except IngestionQueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy processing other files. Please try again shortly"
+        )
+    except IngestionTimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="Parsing the file took too long. Please try a smaller file"
+        )
+    except PageLimitExceededError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File is too long. Maximum allowed is {PARSER_MAX_PAGES} pages"
+        )
+    finally:
+        upload.close()
     if text_content is None:
         raise HTTPException(
             status_code=500,
@@ -44,7 +72,7 @@ def handle_file_upload(file: UploadFile, session_id: str = None):
     user_profile = {
         "filename": file.filename,
         "content_type": file.content_type,
-        "size": len(file_content),
+        "size": upload.size,
         "content": text_content,
         "parsed_at": datetime.utcnow().isoformat()
     }
@@ -1,4 +1,5 @@
 from typing import Optional, TYPE_CHECKING
+from ..helpers.metrics import timed_tool
 
 if TYPE_CHECKING:
     from ..managers.session_manager import SessionManager
@@ -8,6 +9,7 @@ class SessionTools:
         self._session_id = session_id
         self._session_manager = session_manager
         
+    @timed_tool
     def get_user_profile(self) -> str:
         """
         Get the user's resume profile from the session.
@@ -25,6 +27,7 @@ class SessionTools:
         
         return str(profile_content)
 
+    @timed_tool
     def get_job_description(self) -> str:
         """
         Get the job description from the session.
@@ -43,6 +46,7 @@ class SessionTools:
         
         return str(job_description)
 
+    @timed_tool
     def save_resume_markdown(self, resume_markdown: str, version: Optional[int]=None) -> str:
         """
         Save resume markdown to the session.
@@ -66,6 +70,7 @@ class SessionTools:
         else:
             return "Error: Failed to save resume markdown"
 
+    @timed_tool
     def get_resume_markdown(self, version: Optional[int] = None) -> str:
         """
         Get resume markdown from the session.
@@ -84,6 +89,7 @@ class SessionTools:
         return str(resume_markdown)
 
 
+    @timed_tool
     def get_resume_versions(self) -> str:
         """
         Get resume versions for the session.
@@ -95,6 +101,7 @@ class SessionTools:
         
         return str(versions)
     
+    @timed_tool
     async def trigger_resume_updated_event(self, version: Optional[int] = None) -> None:
         """
         Trigger the resume updated event to the client.
@@ -106,6 +113,9 @@ class SessionTools:
             None
         """
         
+        if version is None:
+            version = self._session_manager.get_latest_resume_version(session_id=self._session_id)
+        
         resume_markdown = self._session_manager.get_resume_markdown(session_id=self._session_id, version=version)
         if not resume_markdown:
             return
@@ -114,8 +124,9 @@ class SessionTools:
         if not socket_handler:
             return
         
-        await socket_handler.trigger_resume_updated_event(resume_markdown=resume_markdown)
+        await socket_handler.trigger_resume_updated_event(resume_markdown=resume_markdown, version=version)
         
+    @timed_tool
     async def send_agent_response(self, message: str) -> None:
         """
         Sends message by the agent to be communicated with the client
@@ -131,4 +142,23 @@ class SessionTools:
         if not socket_handler:
             return
 
-        await socket_handler.send_agent_response(message=message)
\ No newline at end of file
+        await socket_handler.send_agent_response(message=message)
+
+    async def send_stream_delta(self, stream: str, delta: str) -> None:
+        """
+        Sends partial agent output to the client while a run is in progress.
+        Not exposed to the agents; used by the team runner when streaming.
+
+        Args:
+            stream: "chat" for message text or "resume" for resume HTML
+            delta: Text produced since the previous delta
+
+        Returns:
+            None
+        """
+
+        socket_handler = self._session_manager.get_websocket_handler(session_id=self._session_id)
+        if not socket_handler:
+            return
+
+        await socket_handler.send_stream_delta(stream=stream, delta=delta)
\ No newline at end of file
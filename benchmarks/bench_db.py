@@ -0,0 +1,57 @@
+"""
+Write and read throughput of the session stores with many resume versions.
+
+Run from the repository root:
+    python -m benchmarks.bench_db
+"""
+import os
+import tempfile
+from backend.db.in_memory_db import InMemoryDB
+from backend.db.sqlite_db import SQLiteDB
+from .fixtures import make_resume_html
+from .harness import measure, print_results
+
+SESSIONS = 500
+VERSIONS = 20
+
+def build_store(backend: str, directory: str, run: int):
+    if backend == "memory":
+        return InMemoryDB()
+    return SQLiteDB(db_path=os.path.join(directory, f"bench-{run}.db"))
+
+def populate(store, session_ids, versions):
+    for session_id in session_ids:
+        store.create_session_record(session_id)
+    for version in versions:
+        for session_id in session_ids:
+            store.update_resume_markdown(session_id=session_id, resume_markdown=version)
+
+def run():
+    results = []
+    session_ids = [f"s{i}" for i in range(SESSIONS)]
+    versions = [make_resume_html(revision=revision) for revision in range(VERSIONS)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ["memory", "sqlite"]:
+            runs = iter(range(3))
+            # Fresh store per sample; the last one is kept for the read benchmarks
+            stores = []
+
+            def write():
+                store = build_store(backend, directory, next(runs))
+                stores.append(store)
+                populate(store, session_ids, versions)
+
+            results.append(measure(f"{backend}: write {VERSIONS} versions x {SESSIONS} sessions", write, repeat=3, ops=SESSIONS * VERSIONS))
+
+            store = stores[-1]
+            oldest = store.get_session_record(session_ids[0]).resume_store.oldest_version
+            results.append(measure(f"{backend}: read latest version", lambda: [store.get_resume_markdown(session_id) for session_id in session_ids], ops=SESSIONS))
+            results.append(measure(f"{backend}: read oldest retained version", lambda: [store.get_resume_markdown(session_id, version=oldest) for session_id in session_ids], ops=SESSIONS))
+            results.append(measure(f"{backend}: get session record", lambda: [store.get_session_record(session_id) for session_id in session_ids], ops=SESSIONS))
+            results.append(measure(f"{backend}: get record version", lambda: [store.get_record_version(session_id) for session_id in session_ids], ops=SESSIONS))
+
+    return results
+
+if __name__ == "__main__":
+    print_results(run())
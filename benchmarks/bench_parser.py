@@ -0,0 +1,72 @@
+"""
+Compare the original string-concatenating parser with the current extraction engine.
+
+Run from the repository root:
+    python -m benchmarks.bench_parser
+"""
+import asyncio
+import io
+import docx
+import PyPDF2
+from backend.helpers.parser import DocumentParser
+from backend.managers.ingestion_manager import IngestionManager
+from .fixtures import make_docx, make_pdf, make_txt
+from .harness import measure, measure_async, print_results
+
+PDF_PAGES = [5, 20, 50, 100]
+DOCX_PARAGRAPHS = [200, 2000, 10000]
+TXT_LINES = [200, 2000, 20000]
+
+def legacy_parse_pdf(file_content: bytes) -> str:
+    """PDF extraction as originally implemented: serial pages and `text +=`."""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+    return text.strip()
+
+def legacy_parse_docx(file_content: bytes) -> str:
+    """DOCX extraction as originally implemented."""
+    doc = docx.Document(io.BytesIO(file_content))
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text.strip()
+
+def first_pages(file_content: bytes, pages: int) -> str:
+    """Read only the first few pages through the lazy iterator."""
+    collected = []
+    for page in DocumentParser.iter_pages(file_content, 'pdf', max_pages=0):
+        collected.append(page)
+        if len(collected) == pages:
+            break
+    return "\n".join(collected)
+
+async def run():
+    results = []
+    ingestion = IngestionManager(parse_timeout=300, pdf_pages_per_task=4, max_pages=0)
+
+    for pages in PDF_PAGES:
+        pdf = make_pdf(pages)
+        assert DocumentParser.parse_file(pdf, 'pdf', max_pages=0) == legacy_parse_pdf(pdf)
+        results.append(measure(f"pdf[{pages}p] legacy", lambda: legacy_parse_pdf(pdf), bytes=len(pdf)))
+        results.append(measure(f"pdf[{pages}p] serial", lambda: DocumentParser.parse_file(pdf, 'pdf', max_pages=0), bytes=len(pdf)))
+        results.append(measure(f"pdf[{pages}p] first 2 pages (lazy)", lambda: first_pages(pdf, 2), bytes=len(pdf)))
+        # Warm the worker pool so process start-up is not counted
+        assert await ingestion.parse(pdf, 'pdf') == legacy_parse_pdf(pdf)
+        results.append(await measure_async(f"pdf[{pages}p] page-parallel", lambda: ingestion.parse(pdf, 'pdf'), bytes=len(pdf)))
+
+    for paragraphs in DOCX_PARAGRAPHS:
+        document = make_docx(paragraphs)
+        results.append(measure(f"docx[{paragraphs}par] legacy", lambda: legacy_parse_docx(document), bytes=len(document)))
+        results.append(measure(f"docx[{paragraphs}par] linear", lambda: DocumentParser.parse_file(document, 'docx'), bytes=len(document)))
+
+    for lines in TXT_LINES:
+        text = make_txt(lines)
+        results.append(measure(f"txt[{lines}l] parse", lambda: DocumentParser.parse_file(text, 'txt'), bytes=len(text)))
+
+    ingestion.shutdown()
+    return results
+
+if __name__ == "__main__":
+    print_results(asyncio.run(run()))
@@ -0,0 +1,60 @@
+"""
+Compare the original full-scan session expiry with the heap-based expiry index.
+
+Run from the repository root:
+    python -m benchmarks.bench_session_expiry
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from backend.helpers.expiry_index import ExpiryIndex
+from .harness import measure, print_results
+
+SESSIONS = 100_000
+EXPIRED_FRACTIONS = [0.0, 0.01]
+TIMEOUT = timedelta(seconds=1800)
+
+def legacy_cleanup(last_updated: dict, now: datetime) -> int:
+    """Cleanup as originally implemented: datetime arithmetic for every live session."""
+    expired = [session_id for session_id, updated in last_updated.items() if (now - updated) > TIMEOUT]
+    for session_id in expired:
+        del last_updated[session_id]
+    return len(expired)
+
+def build_legacy(expired: int) -> dict:
+    now = datetime.utcnow()
+    stale = now - TIMEOUT - timedelta(seconds=1)
+    return {f"s{i}": (stale if i < expired else now) for i in range(SESSIONS)}
+
+def build_index(expired: int) -> ExpiryIndex:
+    now = time.monotonic()
+    index = ExpiryIndex()
+    for i in range(SESSIONS):
+        index.touch(f"s{i}", now - 1 if i < expired else now + TIMEOUT.total_seconds())
+    return index
+
+async def manager_cleanup_results():
+    """Time SessionManager.cleanup_expired_sessions with 100k live, unexpired sessions."""
+    from backend.managers.session_manager import SessionManager
+    manager = SessionManager()
+    for _ in range(SESSIONS):
+        manager.create_session()
+    return [measure(f"SessionManager cleanup, {SESSIONS} live, none expired", manager.cleanup_expired_sessions, repeat=20)]
+
+def run():
+    results = []
+    for fraction in EXPIRED_FRACTIONS:
+        expired = int(SESSIONS * fraction)
+        # Fresh state per run; the lists keep every state alive so deallocation is not timed
+        legacy_states = iter([build_legacy(expired) for _ in range(5)])
+        index_states = iter([build_index(expired) for _ in range(5)])
+        results.append(measure(f"legacy scan, {SESSIONS} sessions, {expired} expired", lambda: legacy_cleanup(next(legacy_states), datetime.utcnow())))
+        results.append(measure(f"expiry index, {SESSIONS} sessions, {expired} expired", lambda: next(index_states).pop_expired(time.monotonic())))
+
+    index = build_index(0)
+    results.append(measure(f"expiry index touch x{SESSIONS}", lambda: [index.touch(f"s{i}", time.monotonic() + 1800) for i in range(SESSIONS)], repeat=3))
+    results.extend(asyncio.run(manager_cleanup_results()))
+    return results
+
+if __name__ == "__main__":
+    print_results(run())
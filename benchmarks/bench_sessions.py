@@ -0,0 +1,43 @@
+"""
+SessionManager costs at 1k, 10k and 100k live sessions.
+
+Run from the repository root:
+    python -m benchmarks.bench_sessions
+"""
+import asyncio
+import random
+from .harness import measure, print_results
+
+SIZES = [1_000, 10_000, 100_000]
+LOOKUPS = 1_000
+EXPIRED_FRACTION = 0.01
+
+async def run():
+    # SessionManager starts its cleanup task on creation, so it needs a running loop
+    from backend.managers.session_manager import SessionManager
+
+    results = []
+    for size in SIZES:
+        manager = SessionManager()
+        session_ids = []
+        results.append(measure(f"create_session x{size}", lambda: session_ids.extend(manager.create_session() for _ in range(size)), repeat=1, ops=size))
+
+        sample = random.Random(size).sample(session_ids, LOOKUPS)
+        results.append(measure(f"get_session, {size} sessions", lambda: [manager.get_session(session_id) for session_id in sample], ops=LOOKUPS))
+        results.append(measure(f"is_valid_session, {size} sessions", lambda: [manager.is_valid_session(session_id) for session_id in sample], ops=LOOKUPS))
+        results.append(measure(f"cleanup_expired_sessions, {size} sessions, none expired", manager.cleanup_expired_sessions))
+
+        # Push a slice of sessions past their deadline; a zero timeout also makes their stored last use stale
+        expired = session_ids[:int(size * EXPIRED_FRACTION)]
+        for session_id in expired:
+            manager._expiry_index.touch(session_id, 0)
+        manager._session_timeout = 0
+        results.append(measure(f"cleanup_expired_sessions, {size} sessions, {len(expired)} expired", manager.cleanup_expired_sessions, repeat=1, ops=len(expired)))
+
+        for session_id in session_ids[len(expired):]:
+            manager.delete_session(session_id)
+
+    return results
+
+if __name__ == "__main__":
+    print_results(asyncio.run(run()))
@@ -0,0 +1,70 @@
+"""Synthetic resume-like documents used by the benchmarks."""
+import io
+import docx
+
+LINE = "Senior Software Engineer - built distributed systems, led a team of {n} engineers, shipped {n} releases"
+
+def make_txt(lines: int) -> bytes:
+    """Plain text document with the given number of lines."""
+    return "\n".join(LINE.format(n=i) for i in range(lines)).encode('utf-8')
+
+def make_docx(paragraphs: int) -> bytes:
+    """DOCX document with the given number of paragraphs."""
+    document = docx.Document()
+    for i in range(paragraphs):
+        document.add_paragraph(LINE.format(n=i))
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def make_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """Minimal text PDF with the given number of pages, written without extra dependencies."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+
+    for page in range(pages):
+        lines = [f"({LINE.format(n=page * lines_per_page + i)}) Tj T*" for i in range(lines_per_page)]
+        stream = ("BT /F1 9 Tf 11 TL 36 806 Td " + " ".join(lines) + " ET").encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode('latin-1')
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return output.getvalue()
+
+def make_resume_html(bullets: int = 40, revision: int = 0) -> str:
+    """Resume-like HTML; each revision rewrites a single bullet, like a refinement would."""
+    items = []
+    for i in range(bullets):
+        text = LINE.format(n=i)
+        if revision and i == revision % bullets:
+            text = f"Revision {revision}: {text}"
+        items.append(f'<li style="margin-bottom: 2px;">{text}</li>')
+    return (
+        '<div id="resume" style="font-family: Arial, sans-serif;">\n'
+        '<h1 style="font-size: 24px;">Jane Doe</h1>\n'
+        '<ul style="margin-left: 18px; font-size: 13px;">\n' + "\n".join(items) + '\n</ul>\n</div>'
+    )
@@ -0,0 +1,54 @@
+"""Tiny timing helpers shared by the benchmark scripts."""
+from typing import Any, Awaitable, Callable, Dict, List
+import math
+import statistics
+import time
+
+def summarize(name: str, samples: List[float], **extra: Any) -> Dict[str, Any]:
+    """Summarize timing samples (seconds) into a result row."""
+    ordered = sorted(samples)
+    row = {
+        "name": name,
+        "runs": len(ordered),
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        **extra
+    }
+    # `ops` is the number of operations per sample
+    if "ops" in extra and row["median_ms"] > 0:
+        row["ops_per_sec"] = round(extra["ops"] / statistics.median(ordered))
+    return row
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of the samples, 0 for an empty list."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def measure(name: str, func: Callable[[], Any], repeat: int = 5, **extra: Any) -> Dict[str, Any]:
+    """Time a synchronous callable."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(name, samples, **extra)
+
+async def measure_async(name: str, func: Callable[[], Awaitable[Any]], repeat: int = 5, **extra: Any) -> Dict[str, Any]:
+    """Time an async callable."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return summarize(name, samples, **extra)
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """Print result rows as an aligned table."""
+    for row in results:
+        extra = " ".join(f"{key}={value}" for key, value in row.items() if key not in {"name", "runs", "mean_ms", "median_ms", "min_ms", "max_ms"})
+        print(f"{row['name']:<48} median {row['median_ms']:>10.2f} ms  min {row['min_ms']:>10.2f} ms  {extra}")
@@ -0,0 +1,261 @@
+"""
+Concurrent session load test over HTTP and WebSocket.
+
+Each simulated user uploads a profile, submits a job description, opens
+`/ws/{session_id}`, generates a resume and sends follow-up messages, the way
+the frontend does. Reports p50/p95/p99 for each step plus server memory and
+`/api/ping` latency (a proxy for event-loop lag) sampled over the run.
+
+By default a server is started with the offline Replay model, so no API key
+or network access is needed. LLM_*, REPLAY_* and other settings are passed
+through from the environment:
+    LLM_MAX_CONCURRENCY=8 python -m benchmarks.load_test --sessions 200 --output load.json
+    python -m benchmarks.load_test --sessions 200 --output load.json
+
+Use --url to target a server that is already running instead (memory is
+then not sampled).
+"""
+from typing import Any, Dict, List, Optional
+from collections import defaultdict
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import websockets
+from .fixtures import make_txt
+from .harness import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOB_DESCRIPTION = "We are hiring a backend engineer (req {n}) to build distributed systems in Python, own services end to end and mentor the team."
+FOLLOW_UP = "Make the summary shorter and highlight leadership ({n})"
+RESUME_EVENTS = {"resume_updated", "resume_patch"}
+DELTA_EVENTS = {"resume_delta", "agent_response_delta"}
+
+class LoadStats:
+    """Latency samples per step, error counts and the server timeline."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.timeline: List[Dict[str, Any]] = []
+        self.completed_sessions = 0
+
+    def record(self, step: str, started: float) -> None:
+        self.latencies[step].append(time.perf_counter() - started)
+
+    def summary(self) -> Dict[str, Any]:
+        steps = {
+            step: {
+                "count": len(samples),
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": max(samples) * 1000
+            }
+            for step, samples in sorted(self.latencies.items())
+        }
+        rss = [sample["rss_mb"] for sample in self.timeline if sample["rss_mb"] is not None]
+        pings = [sample["ping_ms"] for sample in self.timeline if sample["ping_ms"] is not None]
+        return {
+            "completed_sessions": self.completed_sessions,
+            "errors": dict(self.errors),
+            "steps": steps,
+            "peak_rss_mb": max(rss) if rss else None,
+            "ping_p50_ms": percentile(pings, 50),
+            "ping_p99_ms": percentile(pings, 99),
+            "ping_max_ms": max(pings) if pings else None,
+            "timeline": self.timeline
+        }
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def read_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """Resident memory of a local process from /proc, None where unavailable."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.setdefault("AGENTS_MODEL_PROVIDER", "Replay")
+    env.setdefault("DEBUG", "false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+async def wait_until_ready(base_url: str, server: Optional[subprocess.Popen], timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server is not None and server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                if (await client.get("/api/ping")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready within {timeout}s")
+
+async def monitor(base_url: str, pid: Optional[int], stats: LoadStats, interval: float, stop: asyncio.Event) -> None:
+    """Sample server memory and ping latency until stopped."""
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        while not stop.is_set():
+            ping_started = time.perf_counter()
+            try:
+                await client.get("/api/ping")
+                ping_ms = (time.perf_counter() - ping_started) * 1000
+            except httpx.TransportError:
+                ping_ms = None
+            stats.timeline.append({
+                "t": round(time.perf_counter() - started, 2),
+                "rss_mb": read_rss_mb(pid),
+                "ping_ms": ping_ms
+            })
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+async def drive(ws, command: Dict[str, Any], step: str, stats: LoadStats, timeout: float) -> None:
+    """Send one agent command and time its events until the run completes."""
+    started = time.perf_counter()
+    await ws.send(json.dumps(command))
+    seen_delta = seen_resume = False
+
+    while True:
+        event = json.loads(await asyncio.wait_for(ws.recv(), timeout=timeout))
+        event_type = event.get("type")
+        if event_type in DELTA_EVENTS and not seen_delta:
+            seen_delta = True
+            stats.record(f"{step}: first delta", started)
+        elif event_type in RESUME_EVENTS:
+            if not seen_resume:
+                seen_resume = True
+                stats.record(f"{step}: resume_updated", started)
+            # Acknowledge like the frontend so later updates are sent as patches
+            await ws.send(json.dumps({"type": "resume_ack", "version": event.get("version")}))
+        elif event_type == "error":
+            stats.errors[f"{step}: {event.get('message')}"] += 1
+        elif event_type == "agent_response_completed":
+            stats.record(f"{step}: agent_response_completed", started)
+            return
+
+async def run_session(index: int, base_url: str, messages: int, stats: LoadStats, delay: float, timeout: float) -> None:
+    await asyncio.sleep(delay)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+            # Unique inputs per session so the parse and generation caches do not hide the work
+            profile = f"Candidate {index}\n".encode('utf-8') + make_txt(60)
+            started = time.perf_counter()
+            response = await client.post("/api/user-profile/upload", files={"file": (f"profile-{index}.txt", profile, "text/plain")})
+            response.raise_for_status()
+            stats.record("upload", started)
+            session_id = response.json()["session_id"]
+
+            started = time.perf_counter()
+            response = await client.post("/api/job-description", json={"description": JOB_DESCRIPTION.format(n=index)})
+            response.raise_for_status()
+            stats.record("job_description", started)
+
+        ws_url = base_url.replace("http", "ws", 1)
+        started = time.perf_counter()
+        async with websockets.connect(f"{ws_url}/ws/{session_id}", max_size=None) as ws:
+            await ws.send(json.dumps({"type": "connect"}))
+            while json.loads(await asyncio.wait_for(ws.recv(), timeout=timeout)).get("type") != "connected":
+                pass
+            stats.record("ws connect", started)
+
+            await drive(ws, {"type": "generate"}, "generate", stats, timeout)
+            for message in range(messages):
+                await drive(ws, {"type": "user_message", "message": FOLLOW_UP.format(n=message)}, "user_message", stats, timeout)
+
+        stats.completed_sessions += 1
+    except (httpx.HTTPError, websockets.WebSocketException, asyncio.TimeoutError, OSError) as e:
+        stats.errors[f"session: {type(e).__name__}"] += 1
+
+def print_summary(summary: Dict[str, Any], sessions: int, elapsed: float) -> None:
+    print(f"{summary['completed_sessions']}/{sessions} sessions completed in {elapsed:.1f}s")
+    for step, row in summary["steps"].items():
+        print(f"{step:<40} n={row['count']:<5} p50 {row['p50_ms']:>9.1f} ms  p95 {row['p95_ms']:>9.1f} ms  p99 {row['p99_ms']:>9.1f} ms  max {row['max_ms']:>9.1f} ms")
+    if summary["peak_rss_mb"] is not None:
+        print(f"server rss peak {summary['peak_rss_mb']:.1f} MB")
+    print(f"ping p50 {summary['ping_p50_ms']:.1f} ms  p99 {summary['ping_p99_ms']:.1f} ms  max {summary['ping_max_ms'] or 0:.1f} ms")
+    for error, count in summary["errors"].items():
+        print(f"error x{count}: {error}")
+
+    # Every nth sample keeps the printed timeline short; the JSON output has all of them
+    timeline = summary["timeline"]
+    for sample in timeline[::max(1, len(timeline) // 20)]:
+        rss = f"{sample['rss_mb']:.1f} MB" if sample["rss_mb"] is not None else "-"
+        ping = f"{sample['ping_ms']:.1f} ms" if sample["ping_ms"] is not None else "-"
+        print(f"  t={sample['t']:>7.1f}s  rss {rss:>10}  ping {ping:>10}")
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        server = start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    stats = LoadStats()
+    stop = asyncio.Event()
+    try:
+        await wait_until_ready(base_url, server)
+        sampler = asyncio.create_task(monitor(base_url, server.pid if server else None, stats, args.sample_interval, stop))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            run_session(index, base_url, args.messages, stats, args.ramp * index / args.sessions, args.timeout)
+            for index in range(args.sessions)
+        ))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await sampler
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    summary = stats.summary()
+    print_summary(summary, args.sessions, elapsed)
+    return {"sessions": args.sessions, "messages": args.messages, "ramp": args.ramp, "elapsed_s": elapsed, **summary}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="Number of concurrent simulated users")
+    parser.add_argument("--messages", type=int, default=1, help="Follow-up chat messages per session after generating")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which session starts are spread")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for any single response")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between memory and ping samples")
+    parser.add_argument("--url", help="Base URL of a running server, e.g. http://localhost:8000")
+    parser.add_argument("--output", help="Write the summary and timeline to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Run every benchmark module and write the results as JSON.
+
+Run from the repository root:
+    python -m benchmarks.run_all --output results.json
+    python -m benchmarks.run_all --only bench_db --compare baseline.json
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import datetime
+import importlib
+import inspect
+import json
+import platform
+import subprocess
+import sys
+from .harness import print_results
+
+MODULES = ["bench_parser", "bench_db", "bench_sessions", "bench_session_expiry"]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_module(name: str) -> List[Dict[str, Any]]:
+    module = importlib.import_module(f"{__package__}.{name}")
+    if inspect.iscoroutinefunction(module.run):
+        return asyncio.run(module.run())
+    return module.run()
+
+def compare(results: Dict[str, List[Dict[str, Any]]], baseline: Dict[str, Any]) -> None:
+    """Print the change in median time against a previous results file."""
+    for module, rows in results.items():
+        previous = {row["name"]: row for row in baseline.get("results", {}).get(module, [])}
+        for row in rows:
+            before = previous.get(row["name"])
+            if not before or before["median_ms"] <= 0:
+                continue
+            change = (row["median_ms"] - before["median_ms"]) / before["median_ms"] * 100
+            print(f"{module}: {row['name']:<48} {before['median_ms']:>10.2f} -> {row['median_ms']:>10.2f} ms  {change:+.1f}%")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--only", nargs="+", choices=MODULES, help="Run only these benchmark modules")
+    parser.add_argument("--compare", help="Results JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or MODULES:
+        print(f"== {name}")
+        results[name] = run_module(name)
+        print_results(results[name])
+
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"== compared with {baseline.get('commit', 'unknown')}")
+        compare(results, baseline)
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,20 @@ let sessionId = "";
 let ws = null; // web socket
 let isAgentResponseLoading = false;
 let callbackOnWsConnected = () => { }
+let streamingMessageContent = null; // chat bubble receiving agent_response_delta text
+let streamingResume = ""; // resume HTML received through resume_delta, not yet saved
+let committedResume = ""; // last resume confirmed by resume_updated
+let isResumeRenderScheduled = false;
+let resumeVersions = new Map(); // recent resume versions, used as bases for resume_patch
+let activeJobId = null; // queued or running agent job the loader is waiting on
+let lastSeq = null; // sequence number of the last event received, sent on reconnect to replay missed ones
+let eventEpoch = null; // the server's sequence numbering, only resumable within one epoch
+let reconnectAttempts = 0;
+let reconnectTimer = null;
+
+const MAX_CACHED_RESUME_VERSIONS = 5;
+// Must match TOKEN_PATTERN in backend/helpers/text_delta.py
+const RESUME_TOKEN_PATTERN = /[^\n>]*(?:>|\n)|[^\n>]+$/g;
 
 const ERROR_MSG_TYPE = 'error';
 const SUCCESS_MSG_TYPE = 'success';
@@ -259,7 +273,14 @@ function connectWebSocket() {
 
     if (ws && ws.readyState === WebSocket.OPEN) {
         // Socket connection already established and open
-        callbackOnWsConnected?.();
+        const callback = callbackOnWsConnected;
+        callbackOnWsConnected = () => { };
+        callback?.();
+        return;
+    }
+
+    if (ws && ws.readyState === WebSocket.CONNECTING) {
+        // The pending action runs once the server confirms the connection
         return;
     }
 
@@ -271,28 +292,64 @@ function connectWebSocket() {
     ws = new WebSocket(wsUrl);
 
     ws.onopen = () => {
-        // Send initial connection message with session ID
+        reconnectAttempts = 0;
+        // Without a replay the server sends a full resume before patching
+        if (lastSeq === null)
+            resumeVersions.clear();
+
+        // Send initial connection message with session ID and the last event we saw
         ws.send(JSON.stringify({
             type: 'connect',
-            session_id: sessionId
+            session_id: sessionId,
+            epoch: eventEpoch,
+            last_seq: lastSeq
         }));
     };
 
     ws.onmessage = (event) => {
         const data = JSON.parse(event.data);
 
+        if (typeof data.seq === 'number' && data.type !== 'connected') {
+            // Events can arrive both live and in the replay after a reconnect
+            if (lastSeq !== null && data.seq <= lastSeq) return;
+            lastSeq = data.seq;
+        }
+
         switch (data.type) {
-            case 'connected':
+            case 'connected': {
                 sessionId = data.session_id;
-                callbackOnWsConnected?.();
+                eventEpoch = data.epoch;
+                if (!data.resumed)
+                    lastSeq = data.seq;
+                // Run the pending action once, not again on every reconnect
+                const callback = callbackOnWsConnected;
+                callbackOnWsConnected = () => { };
+                callback?.();
                 break;
+            }
 
             case 'agent_response':
                 addAgentMessage(data.message);
                 break;
 
+            case 'agent_response_delta':
+                appendAgentMessageDelta(data.message);
+                break;
+
             case 'resume_updated':
-                updateResumePreview(data.data);
+                commitResume(data.data, data.version);
+                break;
+
+            case 'resume_patch':
+                applyResumePatch(data);
+                break;
+
+            case 'resume_delta':
+                appendResumeDelta(data.data);
+                break;
+
+            case 'queue_position':
+                updateQueuePosition(data.position);
                 break;
             
             case 'agent_response_in_progress':
@@ -303,14 +360,23 @@ function connectWebSocket() {
                 handleAgentResponseCompleted();
                 break;
 
+            case 'job_updated':
+                handleJobUpdated(data.job, data.replayed);
+                break;
+
             case 'error':
                 showToast(data.message, ERROR_MSG_TYPE);
                 break;
         }
     };
 
-    ws.onclose = () => {
+    ws.onclose = (event) => {
         ws = null;
+        // 1008: the session is invalid or expired, so there is nothing to resume
+        if (event.code === 1008)
+            handleSessionExpired();
+        else
+            scheduleReconnect();
     };
 
     ws.onerror = (error) => {
@@ -318,6 +384,55 @@ function connectWebSocket() {
     };
 }
 
+function scheduleReconnect() {
+    if (reconnectTimer) return;
+
+    const delay = Math.min(1000 * 2 ** reconnectAttempts, 30000);
+    reconnectAttempts++;
+    reconnectTimer = setTimeout(() => {
+        reconnectTimer = null;
+        reconnectIfSessionValid();
+    }, delay);
+}
+
+// A rejected handshake closes with 1006 like a network error, so ask the server before retrying
+async function reconnectIfSessionValid() {
+    let result;
+    try {
+        const response = await fetch('/api/session/validate');
+        result = await response.json();
+    } catch (err) {
+        // The server is unreachable; keep retrying with backoff
+        scheduleReconnect();
+        return;
+    }
+
+    if (!result.valid) {
+        handleSessionExpired();
+        return;
+    }
+    connectWebSocket();
+}
+
+// The server no longer has the session, so the next upload starts a new one
+function handleSessionExpired() {
+    clearTimeout(reconnectTimer);
+    reconnectTimer = null;
+    reconnectAttempts = 0;
+    sessionId = "";
+    isFileUploaded = false;
+    isJobSubmitted = false;
+    lastSeq = null;
+    eventEpoch = null;
+    activeJobId = null;
+    resumeVersions.clear();
+    if (isAgentResponseLoading)
+        handleAgentResponseCompleted();
+
+    openInputSections();
+    showToast('Your session has expired. Please upload your profile and job description again', ERROR_MSG_TYPE);
+}
+
 function sendSocketMessage(payload) {
     if (ws && ws.readyState === WebSocket.OPEN) {
         ws.send(JSON.stringify(payload));
@@ -417,14 +532,48 @@ function addChatMessage(userType, message, classNames="") {
 
     // Scroll to the bottom of the chat
     chatMessages.scrollTop = chatMessages.scrollHeight;
+
+    return messageContent;
 }
 
 function addAgentMessage(message) {
-    addChatMessage(AGENT_ROLE, message);
+    if (streamingMessageContent) {
+        // The final message replaces the text streamed so far
+        streamingMessageContent.textContent = message;
+        streamingMessageContent = null;
+    } else {
+        addChatMessage(AGENT_ROLE, message);
+    }
     if (isAgentResponseLoading)
         addAgentResponseLoader();
 }
 
+function appendAgentMessageDelta(delta) {
+    if (!streamingMessageContent) {
+        removeAgentResponseLoader();
+        streamingMessageContent = addChatMessage(AGENT_ROLE, '');
+        if (isAgentResponseLoading)
+            addAgentResponseLoader();
+    }
+    streamingMessageContent.textContent += delta;
+
+    const chatMessages = document.getElementById('chat-messages');
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
+function appendResumeDelta(delta) {
+    streamingResume += delta;
+
+    // Render at most once per frame; the browser closes any tags still open
+    if (isResumeRenderScheduled) return;
+    isResumeRenderScheduled = true;
+    requestAnimationFrame(() => {
+        isResumeRenderScheduled = false;
+        if (streamingResume)
+            updateResumePreview(streamingResume);
+    });
+}
+
 function sendMessage() {
     const chatInput = document.getElementById('chat-input');
     const message = chatInput.value.trim();
@@ -438,6 +587,44 @@ function sendMessage() {
     chatInput.value = '';
 }
 
+function commitResume(content, version) {
+    streamingResume = "";
+    committedResume = content;
+    updateResumePreview(content);
+
+    if (version === undefined || version === null) return;
+
+    resumeVersions.delete(version);
+    resumeVersions.set(version, content);
+    while (resumeVersions.size > MAX_CACHED_RESUME_VERSIONS) {
+        resumeVersions.delete(resumeVersions.keys().next().value);
+    }
+    sendSocketMessage({
+        type: 'resume_ack',
+        version: version
+    });
+}
+
+function applyResumePatch(patch) {
+    const base = resumeVersions.get(patch.base_version);
+    if (base === undefined) {
+        // We no longer have the base version; ask for the full resume
+        sendSocketMessage({ type: 'resume_resync' });
+        return;
+    }
+
+    const baseTokens = base.match(RESUME_TOKEN_PATTERN) || [];
+    const pieces = [];
+    for (const op of patch.ops) {
+        if (op[0] === '=') {
+            pieces.push(...baseTokens.slice(op[1], op[2]));
+        } else {
+            pieces.push(op[1]);
+        }
+    }
+    commitResume(pieces.join(''), patch.version);
+}
+
 function updateResumePreview(content) {
     document.getElementById('resume-preview').innerHTML = content;
 }
@@ -459,9 +646,51 @@ function handleAgentResponseLoading() {
     addAgentResponseLoader();
 }
 
+function updateQueuePosition(position) {
+    document.querySelectorAll(".agent-queue-text").forEach(e => e.remove());
+    if (!position) return;
+
+    // Keep the notice above the loader
+    removeAgentResponseLoader();
+    addChatMessage(AGENT_ROLE, `Lots of requests right now. You're #${position} in line, hang tight...`, 'agent-queue-text');
+    if (isAgentResponseLoading)
+        addAgentResponseLoader();
+}
+
+function handleJobUpdated(job, replayed) {
+    if (!job) return;
+
+    if (job.status === 'queued' || job.status === 'running') {
+        activeJobId = job.job_id;
+        // Live runs announce themselves with agent_response_in_progress
+        if (replayed && !isAgentResponseLoading)
+            handleAgentResponseLoading();
+        return;
+    }
+
+    if (job.job_id === activeJobId)
+        activeJobId = null;
+
+    // A job that finished while disconnected never sent agent_response_completed
+    if (replayed) {
+        if (!activeJobId && isAgentResponseLoading)
+            handleAgentResponseCompleted();
+        if (job.status === 'failed' && job.error)
+            showToast(job.error, ERROR_MSG_TYPE);
+    }
+}
+
 function handleAgentResponseCompleted() {
     isAgentResponseLoading = false;
     removeAgentResponseLoader();
+    updateQueuePosition(0);
+    streamingMessageContent = null;
+
+    // A streamed draft that was never saved should not stay on screen
+    if (streamingResume) {
+        streamingResume = "";
+        updateResumePreview(committedResume);
+    }
     const sendBtn = document.getElementById('send-btn');
     sendBtn.disabled = false;
     sendBtn.classList.remove('disabled');